@@ -0,0 +1,63 @@
+"""Time how long each front end takes to import, i.e. everything before the login window is built.
+
+Each measurement runs in a fresh interpreter so nothing is already cached
+in ``sys.modules``. ``eager`` is the module set the apps used to import at
+startup, for comparison. Results are printed as JSON.
+
+    python benchmarks/import_time.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    "diy_inv": "import diy_inv",
+    "diy_app": "import main",
+    "eager": "import customtkinter, requests, reportlab.platypus, reportlab.lib.styles",
+}
+
+TIMER = """
+import sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(elapsed, int("reportlab.platypus" in sys.modules), int("requests" in sys.modules))
+"""
+
+
+def time_import(statement, cwd):
+    output = subprocess.run([sys.executable, "-c", TIMER.format(statement=statement)], cwd=cwd,
+                            capture_output=True, text=True, check=True).stdout.split()
+    return float(output[0]), bool(int(output[1])), bool(int(output[2]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    for name, statement in TARGETS.items():
+        cwd = os.path.join(ROOT, "diy_app") if name == "diy_app" else ROOT
+        timings = []
+        for _ in range(args.runs):
+            seconds, reportlab_loaded, requests_loaded = time_import(statement, cwd)
+            timings.append(seconds)
+        results[name] = {
+            "median_ms": round(statistics.median(timings) * 1000, 1),
+            "min_ms": round(min(timings) * 1000, 1),
+            "reportlab_loaded": reportlab_loaded,
+            "requests_loaded": requests_loaded,
+        }
+
+    json.dump({"python": sys.version.split()[0], "runs": args.runs, "results": results}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
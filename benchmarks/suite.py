@@ -0,0 +1,318 @@
+"""Time the InventoryApp hot paths against synthetic catalogs of growing size.
+
+For each size a temporary working directory gets a generated
+inventory.json, users.json and reports.json, and the app's own methods are
+timed against it. Results are written as JSON, with the current commit, so
+runs can be compared:
+
+    python benchmarks/suite.py --output before.json
+    python benchmarks/suite.py --output after.json --compare before.json
+
+With a display (a real one or ``xvfb-run python benchmarks/suite.py``)
+the full app is built and the screen and row methods are timed too.
+Without one the app object is created without its Tk window and only the
+data paths are timed: init_data_files, login, the search index,
+save_component_data, generate_and_export_report and the PDF renderer.
+Alert dialogs are suppressed in both modes so a modal grab cannot stall
+the run; an error alert stops the run instead, so a failing path is never
+timed as if it worked.
+"""
+import argparse
+import importlib
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from diy_core import (BACKENDS, ExportQueue, InventoryIndex, ReportService, open_storage,  # noqa: E402
+                      render_inventory_report)
+
+APPS = {"diy_inv": (ROOT, "diy_inv"), "diy_app": (os.path.join(ROOT, "diy_app"), "main")}
+
+
+class FieldValue:
+    """Stands in for a row entry widget when save_component_data is timed without a display"""
+
+    def __init__(self, value):
+        self.value = str(value)
+
+    def get(self):
+        return self.value
+
+
+class Offscreen:
+    """Stands in for the component list and the SAVE ALL button without a display: no rows are on screen"""
+
+    def visible_rows(self):
+        return []
+
+    def configure(self, **kwargs):
+        pass
+
+
+def suppressed_alert(title, message):
+    """Replaces show_alert: no dialog, and an error alert means the timed path failed, so the run stops"""
+    if title == "Error":
+        raise RuntimeError(message)
+
+
+def make_inventory(size):
+    images = sorted(os.path.join(ROOT, "diy_images", name) for name in os.listdir(os.path.join(ROOT, "diy_images")))
+    inventory = {}
+    for i in range(size):
+        working = i % 50
+        inventory[f"Component {i:06d}"] = {
+            "image_url": images[i % len(images)],
+            "quantity_in_hand": working + i % 3,
+            "number_working": working,
+            "number_not_working": i % 3,
+            "reason": "worn out" if i % 3 else ""
+        }
+    return inventory
+
+
+def write_data(directory, size):
+    inventory = make_inventory(size)
+    users = {f"DIY{i}": {"teacher_name": f"Teacher{i}", "branch_name": f"Branch {i % 5}", "password": "password123"}
+             for i in range(max(1, size // 10))}
+    reports = {"next_report_id": 3, "reports": {}}
+    for n in (1, 2):
+        reports["reports"][f"#{n:05d}"] = {"generated_by": "DIY0", "branch_name": "Branch 0",
+                                           "generated_date": "2025-01-0%d 10:00:00" % n, "inventory_data": inventory}
+
+    for name, data in (("inventory.json", inventory), ("users.json", users), ("reports.json", reports)):
+        with open(os.path.join(directory, name), "w") as f:
+            json.dump(data, f, indent=2)
+
+
+def have_display():
+    import tkinter
+    try:
+        tkinter.Tk().destroy()
+        return True
+    except tkinter.TclError:
+        return False
+
+
+def headless_app(app_class, backend):
+    """An app object with the data-side state __init__ sets up, but no Tk window"""
+    app = app_class.__new__(app_class)
+    app.storage = open_storage(backend)
+    app.user_store = app.storage.users
+    app.inventory_store = None
+    app.search_index = InventoryIndex()
+    app.report_archive = app.storage.reports
+    app.export_queue = ExportQueue()
+    app.report_service = ReportService(app.inventory_store, app.report_archive, app.export_queue)
+    app.export_status_frame = None
+    # Already "watching" keeps generate_and_export_report from scheduling Tk callbacks
+    app.watching_exports = True
+    app.unsaved_edits = {}
+    app.edit_versions = {}
+    app.inventory_preview = None
+    app.component_list = app.save_all_button = Offscreen()
+    app.notify = lambda message, kind="info", key=None: None
+    return app
+
+
+def summarize(timings):
+    return {"median_ms": round(statistics.median(timings) * 1000, 3), "min_ms": round(min(timings) * 1000, 3),
+            "runs": len(timings)}
+
+
+def timed(func, repeat):
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(i)
+        timings.append(time.perf_counter() - start)
+    return summarize(timings)
+
+
+def wait_for_exports(app):
+    while app.export_queue.active():
+        if hasattr(app, "root"):
+            app.root.update()
+        time.sleep(0.005)
+
+
+def run_size(app_class, size, args, gui):
+    results = {}
+    names = [f"Component {i:06d}" for i in range(size)]
+
+    # The SQLite backend imports the generated JSON files here, the first time it is opened
+    start = time.perf_counter()
+    if gui:
+        app = app_class()
+    else:
+        app = headless_app(app_class, args.storage)
+    results["open_storage"] = summarize([time.perf_counter() - start])
+    app.show_alert = suppressed_alert
+    app.current_user = "DIY0"
+    app.current_user_data = {"teacher_name": "Teacher0", "branch_name": "Branch 0"}
+
+    # The first branch to log in gets its shard copied from the generated inventory.json
+    start = time.perf_counter()
+    app.open_branch("Branch 0")
+    results["open_branch"] = summarize([time.perf_counter() - start])
+
+    results["init_data_files"] = timed(lambda i: app.init_data_files(), args.repeat)
+    results["login"] = timed(lambda i: app.user_store.authenticate("DIY0", "password123"), args.repeat)
+
+    start = time.perf_counter()
+    app.inventory_store.load()
+    results["load_inventory"] = summarize([time.perf_counter() - start])
+
+    if gui:
+        import customtkinter as ctk
+
+        def show_screen(i):
+            app.show_inventory_screen()
+            app.root.update()
+        results["show_inventory_screen"] = timed(show_screen, args.repeat)
+
+        scratch = ctk.CTkFrame(app.root)
+        rows = []
+        results["create_component_row"] = timed(lambda i: rows.append(app.create_component_row(scratch)),
+                                                max(args.repeat, 20))
+        scratch.destroy()
+
+    # A fresh index per run, then the searches typing "component 0012" and ticking a filter would run
+    results["search_index_build"] = timed(lambda i: InventoryIndex().sync(app.inventory_store), args.repeat)
+    app.search_index.sync(app.inventory_store)
+    query = "component 0012"
+    results["search_keystroke"] = timed(lambda i: app.search_index.search(query[:i % len(query) + 1]),
+                                        max(args.repeat, len(query)))
+    results["search_filter"] = timed(lambda i: app.search_index.search("comp", ["not_working"]), args.repeat)
+
+    def save(i):
+        name = names[i * 7919 % size]
+        app.save_component_data(name, FieldValue(60), FieldValue(55), FieldValue(5), FieldValue("bench"))
+    results["save_component_data"] = timed(save, args.repeat)
+
+    # What SAVE ALL writes after a lab audit touches 40 machines
+    def save_batch(i):
+        batch = {names[(i * 40 + n) * 7919 % size]: {"quantity_in_hand": 60, "number_working": 55 - i,
+                                                     "number_not_working": 5 + i, "reason": "audit"}
+                 for n in range(40)}
+        app.inventory_store.save_components(batch)
+    results["save_components_40"] = timed(save_batch, args.repeat)
+
+    start = time.perf_counter()
+    app.inventory_store.flush()
+    results["flush_inventory"] = summarize([time.perf_counter() - start])
+
+    if size > args.pdf_limit:
+        skipped = {"skipped": f"more than --pdf-limit {args.pdf_limit} components"}
+        for name in ("generate_and_export_report", "export_to_pdf", "render_inventory_report"):
+            results[name] = skipped
+    else:
+        # generate_and_export_report only queues the export; the export itself is timed separately
+        generate_timings = []
+        export_timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            app.generate_and_export_report()
+            generate_timings.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            wait_for_exports(app)
+            export_timings.append(time.perf_counter() - start)
+        results["generate_and_export_report"] = summarize(generate_timings)
+        results["export_to_pdf"] = summarize(export_timings)
+
+        report_data = {"generated_by": "DIY0", "branch_name": "Branch 0", "generated_date": "2025-01-01 10:00:00",
+                       "report_id": "#99999", "inventory_data": app.inventory_store.components()}
+        results["render_inventory_report"] = timed(lambda i: render_inventory_report(report_data, "bench.pdf"),
+                                                   args.repeat)
+
+    # "What broke since term start": the first report against the inventory now, and against the latest report
+    report_ids = [entry["report_id"] for entry in app.report_archive.list_reports()]
+    results["compare_report_to_now"] = timed(lambda i: app.report_service.compare(report_ids[0]), args.repeat)
+    results["compare_reports"] = timed(lambda i: app.report_service.compare(report_ids[0], report_ids[-1]),
+                                       args.repeat)
+
+    app.export_queue.shutdown()
+    app.storage.close()
+    if gui:
+        app.image_loader.shutdown()
+        app.root.destroy()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, results):
+    """Print each operation's median against the baseline run"""
+    for size, operations in results["sizes"].items():
+        for name, current in operations.items():
+            before = baseline.get("sizes", {}).get(size, {}).get(name, {})
+            if "median_ms" not in current or not before.get("median_ms"):
+                continue
+            ratio = current["median_ms"] / before["median_ms"]
+            print(f"{size:>7} {name:<28} {before['median_ms']:>10.2f} -> {current['median_ms']:>10.2f} ms"
+                  f"  x{ratio:.2f}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", choices=sorted(APPS), default="diy_inv")
+    parser.add_argument("--sizes", default="100,1000,10000,100000",
+                        help="comma-separated catalog sizes (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--pdf-limit", type=int, default=10000,
+                        help="skip report generation above this many components (default: %(default)s)")
+    parser.add_argument("--storage", choices=BACKENDS, default="json",
+                        help="storage backend the app is given (default: %(default)s)")
+    parser.add_argument("--headless", action="store_true", help="time only the data paths even if a display exists")
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    # A full app picks its backend up from the environment, the way it would on a lab machine
+    os.environ["DIY_STORAGE"] = args.storage
+    app_dir, module_name = APPS[args.app]
+    sys.path.insert(0, app_dir)
+    app_class = importlib.import_module(module_name).InventoryApp
+    gui = not args.headless and have_display()
+
+    results = {"app": args.app, "mode": "gui" if gui else "headless", "commit": git_commit(),
+               "storage": args.storage, "python": sys.version.split()[0], "repeat": args.repeat, "sizes": {}}
+    cwd = os.getcwd()
+    for size in (int(s) for s in args.sizes.split(",")):
+        directory = tempfile.mkdtemp(prefix=f"diy_bench_{size}_")
+        try:
+            write_data(directory, size)
+            os.chdir(directory)
+            results["sizes"][str(size)] = run_size(app_class, size, args, gui)
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(directory, ignore_errors=True)
+        print(f"{size} components done", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
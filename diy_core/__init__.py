@@ -0,0 +1,34 @@
+"""Shared, UI-independent pieces of the DIY lab inventory app.
+
+Everything here works without a display, so the front ends stay thin and
+the data, report and PDF paths can be benchmarked and profiled headlessly.
+"""
+
+from diy_core.branches import BranchInventories, BranchTotals, branch_key
+from diy_core.exports import ExportCancelled, ExportJob, ExportQueue
+from diy_core.journal import InventoryJournal
+from diy_core.jsonfile import read_json, write_json
+from diy_core.metrics import Metrics, host_metrics_file, metrics
+from diy_core.passwords import PASSWORD_ITERATIONS, hash_password, verify_password
+from diy_core.pdf_report import render_inventory_report
+from diy_core.pdf_stream import StreamingStory, flowables_height, rows_per_page
+from diy_core.report_diff import compare_inventories, compare_reports, diff_summary, find_report, is_broken
+from diy_core.report_service import ReportService
+from diy_core.reports import ReportArchive, diff_inventory, report_totals
+from diy_core.search import SEARCH_FILTERS, InventoryIndex
+from diy_core.session import SESSION_LIFETIME, SessionStore
+from diy_core.storage import BACKENDS, Storage, open_storage
+from diy_core.store import (COMPONENT_FIELDS, EditConflict, InventoryStore, collect_component_changes,
+                            component_version, parse_component_fields)
+from diy_core.thumbnails import ThumbnailStore
+from diy_core.users import UsernameTaken, UserStore
+from diy_core.warmup import prewarm
+
+__all__ = ["BACKENDS", "COMPONENT_FIELDS", "PASSWORD_ITERATIONS", "SEARCH_FILTERS", "SESSION_LIFETIME",
+           "BranchInventories", "BranchTotals", "EditConflict", "ExportCancelled", "ExportJob", "ExportQueue",
+           "InventoryIndex", "InventoryJournal", "InventoryStore", "Metrics", "ReportArchive", "ReportService",
+           "SessionStore", "Storage", "StreamingStory", "ThumbnailStore", "UserStore", "UsernameTaken", "branch_key",
+           "collect_component_changes", "compare_inventories", "compare_reports", "component_version", "diff_inventory",
+           "diff_summary", "find_report", "flowables_height", "hash_password", "host_metrics_file", "is_broken",
+           "metrics", "open_storage", "parse_component_fields", "prewarm", "read_json", "render_inventory_report",
+           "report_totals", "rows_per_page", "verify_password", "write_json"]
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import re
+
+from diy_core.filelock import FileLock
+from diy_core.jsonfile import read_json, write_json
+from diy_core.store import InventoryStore
+
+# Counts summed across branches in the all-branches view
+TOTAL_FIELDS = ("quantity_in_hand", "number_working", "number_not_working")
+
+
+def branch_key(branch_name):
+    """File-name-safe key for a branch; names that differ only in case or punctuation share a key"""
+    # Letters and digits of any script are kept, so names written without Latin ones still get their own key
+    key = re.sub(r"[\W_]+", "-", branch_name.lower()).strip("-")
+    if key:
+        return key
+    return "branch-" + hashlib.sha256(branch_name.encode("utf-8")).hexdigest()[:8]
+
+
+def seed_branch(catalog, claim):
+    """Inventory for a new branch: the catalog's components, with their counts only when ``claim``"""
+    if claim:
+        return {name: dict(data) for name, data in catalog.items()}
+    return {name: blank_component(data) for name, data in catalog.items()}
+
+
+def blank_component(data):
+    component = {"image_url": data.get("image_url", "")}
+    component.update((field, 0) for field in TOTAL_FIELDS)
+    component["reason"] = ""
+    return component
+
+
+class BranchInventories:
+    """One inventory shard per branch, so a branch only ever loads its own.
+
+    inventory.json stays the shared catalog. The first branch to open a
+    shard takes over its counts (which is what every branch saw before
+    shards existed); later branches start from its components with zero
+    counts, and components added to the catalog later are added to a shard
+    when it is opened. ``branches.json`` maps shard keys to the branch
+    names they were made for.
+    """
+
+    def __init__(self, catalog, directory="inventory"):
+        self.catalog = catalog
+        self.directory = directory
+        self.registry_path = os.path.join(directory, "branches.json")
+        self.lock = FileLock(os.path.join(directory, "branches.lock"))
+        self._stores = {}
+
+    def names(self):
+        """``{key: branch name}`` for every branch with a shard, oldest first"""
+        return read_json(self.registry_path, default={})
+
+    def store(self, branch_name):
+        """The inventory store of ``branch_name``, creating its shard on first use"""
+        key = branch_key(branch_name)
+        store = self._stores.get(key)
+        if store is None:
+            if key not in self.names():
+                self._create(key, branch_name)
+            store = self._stores[key] = self._open(key)
+            self._add_new_components(store)
+        return store
+
+    def _open(self, key):
+        return InventoryStore(os.path.join(self.directory, key + ".json"))
+
+    def _create(self, key, branch_name):
+        os.makedirs(self.directory, exist_ok=True)
+        with self.lock:
+            names = self.names()
+            # Another copy of the app may have created it while this one waited
+            if key in names:
+                return
+            path = os.path.join(self.directory, key + ".json")
+            if not os.path.exists(path):
+                write_json(path, seed_branch(self.catalog.components(), claim=not names), backup=False)
+            names[key] = branch_name
+            write_json(self.registry_path, names)
+
+    def _add_new_components(self, store):
+        inventory = store.components()
+        missing = {name: blank_component(data) for name, data in self.catalog.components().items()
+                   if name not in inventory}
+        if missing:
+            store.save_components(missing)
+
+    def close(self):
+        for store in self._stores.values():
+            store.close()
+
+
+class BranchTotals:
+    """Component counts summed over every branch, for the all-branches view.
+
+    Each branch's share is remembered with the store generation it was
+    read at, so ``refresh`` only re-adds the branches that changed since
+    the last call instead of summing every shard again.
+    """
+
+    def __init__(self, branches):
+        self.branches = branches
+        self.totals = {}
+        self._shares = {}
+
+    def refresh(self):
+        """Bring ``totals`` up to date and return it: ``{name: {field: sum, "branches": count}}``"""
+        for key, branch_name in self.branches.names().items():
+            store = self.branches.store(branch_name)
+            inventory = store.components()
+            generation, old = self._shares.get(key, (None, {}))
+            if generation == store.generation:
+                continue
+
+            new = {name: tuple(data.get(field, 0) for field in TOTAL_FIELDS) for name, data in inventory.items()}
+            for name in old.keys() - new.keys():
+                self._add(name, old[name], -1)
+            for name, counts in new.items():
+                if name not in old:
+                    self._add(name, counts, 1)
+                elif old[name] != counts:
+                    self._add(name, tuple(after - before for before, after in zip(old[name], counts)), 0)
+            self._shares[key] = (store.generation, new)
+        return self.totals
+
+    def _add(self, name, counts, branches):
+        totals = self.totals.setdefault(name, dict.fromkeys(TOTAL_FIELDS + ("branches",), 0))
+        for field, count in zip(TOTAL_FIELDS, counts):
+            totals[field] += count
+        totals["branches"] += branches
+        if totals["branches"] == 0:
+            del self.totals[name]
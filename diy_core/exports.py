@@ -0,0 +1,134 @@
+import itertools
+import os
+import queue
+import threading
+
+
+class ExportCancelled(Exception):
+    """Raised inside a running export once its job has been cancelled"""
+
+
+class ExportJob:
+    """One queued report export, with progress the UI can poll"""
+
+    def __init__(self, job_id, filename, build):
+        self.job_id = job_id
+        self.filename = filename
+        self.build = build
+        self.status = "queued"
+        self.progress = 0.0
+        self.error = None
+        self._cancel = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    def cancel(self):
+        self._cancel.set()
+        # A job that has not started yet is done with right away
+        if self.status == "queued":
+            self.status = "cancelled"
+
+    def report_progress(self, fraction):
+        """Record progress from the builder; raises ExportCancelled if the job was cancelled"""
+        if self._cancel.is_set():
+            raise ExportCancelled()
+        self.progress = min(max(fraction, 0.0), 1.0)
+
+
+class ExportQueue:
+    """Runs report exports one after another on a background thread.
+
+    ``build(path, job)`` writes the report to ``path`` and should call
+    ``job.report_progress`` as it goes, which is also where a cancelled job
+    stops. Reports are written under a temporary name and renamed when
+    complete, so a cancelled or failed export never leaves a partial PDF.
+    """
+
+    def __init__(self):
+        self._jobs = []
+        self._pending = queue.Queue()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def submit(self, filename, build):
+        with self._lock:
+            job = ExportJob(next(self._ids), self._unique_filename(filename), build)
+            self._jobs.append(job)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+        self._pending.put(job)
+        return job
+
+    def _unique_filename(self, filename):
+        # Two exports started within the same second would otherwise share a timestamped name
+        taken = {job.filename for job in self._jobs if not job.finished}
+        base, ext = os.path.splitext(filename)
+        candidate = filename
+        for n in itertools.count(2):
+            if candidate not in taken and not os.path.exists(candidate):
+                return candidate
+            candidate = f"{base}_{n}{ext}"
+
+    def _run(self):
+        while True:
+            job = self._pending.get()
+            if job is None:
+                return
+            self._run_job(job)
+
+    def _run_job(self, job):
+        if job._cancel.is_set():
+            job.status = "cancelled"
+            return
+
+        job.status = "running"
+        tmp_path = job.filename + ".part"
+        try:
+            job.build(tmp_path, job)
+            os.replace(tmp_path, job.filename)
+            job.progress = 1.0
+            job.status = "done"
+        except ExportCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.error = e
+            job.status = "failed"
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def current_job(self):
+        """The running job, or the next one to run; None when the queue is idle"""
+        with self._lock:
+            for job in self._jobs:
+                if not job.finished:
+                    return job
+        return None
+
+    def queued_count(self):
+        with self._lock:
+            return sum(1 for job in self._jobs if job.status == "queued")
+
+    def active(self):
+        return self.current_job() is not None
+
+    def take_finished(self):
+        """Return finished jobs not returned before, so each one is reported exactly once"""
+        with self._lock:
+            finished = [job for job in self._jobs if job.finished]
+            self._jobs = [job for job in self._jobs if not job.finished]
+        return finished
+
+    def shutdown(self):
+        """Cancel every queued or running export and wait for the worker to stop"""
+        with self._lock:
+            for job in self._jobs:
+                job.cancel()
+            worker = self._worker
+        if worker is not None:
+            self._pending.put(None)
+            worker.join()
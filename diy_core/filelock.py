@@ -0,0 +1,75 @@
+import os
+import threading
+import time
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+def _try_lock(f):
+    try:
+        if os.name == "nt":
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(f):
+    if os.name == "nt":
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class FileLock:
+    """An exclusive lock shared by every copy of the app using the same data files.
+
+    The lock is held on ``path`` itself, which is created when missing and
+    never removed, so a crashed holder releases it with its process. Taking
+    it again from the thread that holds it just nests; other threads wait.
+    """
+
+    def __init__(self, path, timeout=10):
+        self.path = path
+        self.timeout = timeout
+        self._thread_lock = threading.RLock()
+        self._file = None
+        self._depth = 0
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._acquire()
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def _acquire(self):
+        f = open(self.path, "a+b")
+        deadline = time.monotonic() + self.timeout
+        while not _try_lock(f):
+            if time.monotonic() > deadline:
+                f.close()
+                raise TimeoutError(f"{self.path} is still locked by another copy of the app")
+            time.sleep(0.01)
+        self._file = f
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                _unlock(self._file)
+            finally:
+                self._file.close()
+                self._file = None
+        self._thread_lock.release()
@@ -0,0 +1,263 @@
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+from diy_core.filelock import FileLock
+from diy_core.jsonfile import fsync_dir, read_json, replace_file
+from diy_core.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+
+def file_signature(path):
+    """Return (mtime, size) for ``path``, or None when it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def file_size(path):
+    """Return the size of ``path``, or 0 when it does not exist"""
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+def record_changes(record):
+    """The ``{component_name: fields}`` a journal record applies, for single and batch records alike"""
+    if "components" in record:
+        return record["components"]
+    return {record["component"]: record["fields"]}
+
+
+class InventoryJournal:
+    """Append-only change log in front of inventory.json.
+
+    Every save appends one JSON line with the component's new fields and
+    fsyncs it, so a save costs the size of the change instead of the size of
+    the catalog. While the app runs the in-memory ``inventory`` dict is the
+    source of truth; inventory.json is only rewritten when the journal is
+    compacted, which happens on a background thread.
+
+    A batch save is a single record holding every component it changed, so
+    it is applied completely or (if the line was torn) not at all.
+
+    Records carry absolute field values, so replaying one that was already
+    folded into inventory.json is harmless. That keeps recovery simple when
+    the app dies halfway through a compaction.
+
+    Several copies of the app may share the files, e.g. lab PCs working
+    from a shared drive. Appends and compactions happen under
+    ``inventory.json.lock``, and each starts by applying what the other
+    copies appended since this one last looked (or by reloading, when one
+    of them compacted), so no copy writes over records it has not seen.
+
+    ``dirty`` holds the components whose latest values only exist in the
+    journal, and ``signature`` the (mtime, size) of inventory.json as last
+    read or written, so callers can tell when someone else has edited it.
+    ``generation`` goes up whenever ``inventory`` changes.
+
+    Discarded records and failed compactions are logged and also kept in
+    ``problems``, for the app to show once it next polls the store.
+    """
+
+    def __init__(self, data_path, journal_path=None, compact_after=200):
+        self.data_path = data_path
+        self.journal_path = journal_path or data_path + ".journal"
+        self.compact_after = compact_after
+        self.inventory = None
+        self.dirty = set()
+        self.signature = None
+        self.generation = 0
+        self.lock = FileLock(data_path + ".lock")
+        self._lock = threading.RLock()
+        # Bytes of the journal already applied to ``inventory``
+        self._offset = 0
+        self._pending = 0
+        self._compactor = None
+        self.problems = []
+
+    def load(self):
+        """Load inventory.json and replay whatever the last run left in the journal"""
+        with self._lock, self.lock:
+            # Taken before reading so an edit made while parsing is still noticed later
+            self.signature = file_signature(self.data_path)
+            # A damaged inventory.json falls back to the copy kept by the previous compaction
+            with metrics.timer("inventory.load"):
+                self.inventory = read_json(self.data_path, default={}, restore=True)
+            self.dirty = set()
+            self.generation += 1
+            self._offset = 0
+            self._pending = self._replay()
+            return self.inventory
+
+    def _replay(self):
+        """Apply the records appended since ``_offset``; returns how many there were"""
+        try:
+            f = open(self.journal_path, "rb")
+        except FileNotFoundError:
+            return 0
+
+        applied = 0
+        with f:
+            f.seek(self._offset)
+            for line in f:
+                # A crash mid-append leaves a torn last line that was never acknowledged
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    # Checked in full before anything is applied, so a batch still applies completely or not at all
+                    changes = {component_name: dict(fields)
+                               for component_name, fields in record_changes(json.loads(line)).items()}
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    # A damaged record in the middle only loses itself, not the saves after it
+                    log.warning("Skipping a damaged record at byte %d of %s", self._offset, self.journal_path)
+                    self.problems.append(f"Skipped a damaged save in {self.journal_path}")
+                else:
+                    for component_name, fields in changes.items():
+                        self._apply(component_name, fields)
+                    applied += 1
+                self._offset += len(line)
+            size = f.seek(0, os.SEEK_END)
+
+        # Appends only happen under the lock, so an unfinished line here is never one still being written
+        if self._offset < size:
+            log.warning("Discarding %d bytes of incomplete records at the end of %s", size - self._offset,
+                        self.journal_path)
+            self.problems.append(f"Discarded an unfinished save at the end of {self.journal_path}")
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(self._offset)
+                os.fsync(f.fileno())
+        return applied
+
+    def is_stale(self):
+        """True when another copy of the app has appended or compacted since this one last looked"""
+        return (file_signature(self.data_path) != self.signature
+                or file_size(self.journal_path) != self._offset)
+
+    def sync(self):
+        """Catch up with what other copies of the app saved; returns whether anything changed"""
+        with self._lock, self.lock:
+            if file_signature(self.data_path) != self.signature:
+                self.load()
+                return True
+            applied = self._replay()
+            self._pending += applied
+            return applied > 0
+
+    @contextmanager
+    def locked(self):
+        """Hold the lock with ``inventory`` up to date, so it can be checked before an append"""
+        with self._lock, self.lock:
+            self.sync()
+            yield self.inventory
+
+    def _apply(self, component_name, fields):
+        self.inventory.setdefault(component_name, {}).update(fields)
+        self.dirty.add(component_name)
+        self.generation += 1
+
+    def update(self, component_name, fields):
+        """Apply ``fields`` to one component and durably log the change"""
+        self._append({"component": component_name, "fields": fields})
+
+    def update_many(self, changes):
+        """Apply ``{component_name: fields}`` for several components as one all-or-nothing record"""
+        self._append({"components": changes})
+
+    def _append(self, record):
+        line = (json.dumps(record) + "\n").encode("utf-8")
+        with self._lock, self.lock:
+            self.sync()
+            # Opened per append, so no copy of the app holds the file open while another replaces it
+            with open(self.journal_path, "ab") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._offset += len(line)
+
+            for component_name, fields in record_changes(record).items():
+                self._apply(component_name, fields)
+            self._pending += 1
+            if self._pending >= self.compact_after:
+                self.compact()
+
+    def compact(self, wait=False):
+        """Fold the journal into inventory.json on a background thread"""
+        with self._lock:
+            if self._compactor is None or not self._compactor.is_alive():
+                self._compactor = threading.Thread(target=self._run_compaction, daemon=True)
+                self._compactor.start()
+            compactor = self._compactor
+
+        if wait:
+            compactor.join()
+
+    def _run_compaction(self):
+        try:
+            self._compact()
+        except Exception as e:
+            log.exception("Error compacting %s", self.journal_path)
+            self.problems.append(f"Could not write {self.data_path} ({e}); saves are kept in the journal")
+
+    def _compact(self):
+        with self._lock, self.lock:
+            self.sync()
+            snapshot = {name: dict(data) for name, data in self.inventory.items()}
+            offset = self._offset
+            signature = self.signature
+
+        # Writing the full file is the slow part, so it happens without the lock
+        # (under a per-process name, as other copies may be compacting too)
+        tmp_path = f"{self.data_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f, metrics.timer("inventory.dump"):
+            json.dump(snapshot, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+
+        with self._lock, self.lock:
+            if file_signature(self.data_path) != signature:
+                # Another copy compacted meanwhile; whatever its file lacks is still in its journal tail
+                os.remove(tmp_path)
+                return
+            # Other copies may have appended while the snapshot was written; apply their records first, or they
+            # would only be marked dirty here and the next compaction would write this copy's old values over them
+            self._replay()
+            replace_file(tmp_path, self.data_path)
+            self.signature = file_signature(self.data_path)
+
+            # Keep only the records appended while the snapshot was being written
+            try:
+                with open(self.journal_path, "rb") as f:
+                    f.seek(offset)
+                    tail = f.read()
+            except FileNotFoundError:
+                tail = b""
+
+            tmp_path = self.journal_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(tail)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.journal_path)
+            fsync_dir(self.journal_path)
+
+            self._offset = len(tail)
+            records = [json.loads(line) for line in tail.splitlines()]
+            self.dirty = {name for record in records for name in record_changes(record)}
+            self._pending = len(records)
+
+    def close(self):
+        """Wait for any running compaction and fold what is left into inventory.json"""
+        if self.inventory is None:
+            return
+
+        if self._compactor is not None:
+            self._compactor.join()
+        if self._pending:
+            self._run_compaction()
@@ -0,0 +1,87 @@
+import json
+import logging
+import os
+import shutil
+
+BACKUP_SUFFIX = ".bak"
+
+_MISSING = object()
+
+log = logging.getLogger(__name__)
+
+
+def fsync_dir(path):
+    """Make a rename inside ``path``'s directory durable (no-op on Windows)"""
+    if os.name != "posix":
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def replace_file(tmp_path, path, backup=True):
+    """Rename a fully written ``tmp_path`` over ``path``, keeping the old version as ``path.bak``.
+
+    The backup is a hard link to (or a copy of) the old file made before
+    the rename, so readers on other PCs never find ``path`` missing.
+    """
+    if backup and os.path.exists(path):
+        backup_tmp_path = f"{path}{BACKUP_SUFFIX}.{os.getpid()}.tmp"
+        try:
+            os.link(path, backup_tmp_path)
+        except OSError:
+            # Shares without hard links (or a link left by a crash) get a fresh copy
+            shutil.copyfile(path, backup_tmp_path)
+        os.replace(backup_tmp_path, path + BACKUP_SUFFIX)
+    os.replace(tmp_path, path)
+    fsync_dir(path)
+
+
+def write_json(path, data, indent=2, backup=True):
+    """Replace ``path`` with ``data`` as JSON without ever leaving a half-written file.
+
+    The data goes to a temporary file that is fsynced and then renamed over
+    ``path``, so a crash leaves either the old file or the new one. With
+    ``backup`` the previous version is kept as ``path.bak`` for read_json
+    to fall back to.
+    """
+    # Per process, so two PCs writing the same file never share a temporary one
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    replace_file(tmp_path, path, backup)
+
+
+def read_json(path, default=_MISSING, restore=False):
+    """Load ``path``, falling back to ``path.bak`` when it is missing or does not parse.
+
+    With ``restore`` a good backup is also written back over the damaged
+    file, so the next read is a plain load again; only pass it while
+    holding the file's lock, or the restore could replace a newer file
+    another copy of the app just wrote. When neither file exists
+    ``default`` is returned if given; otherwise the original error is
+    raised.
+    """
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        error = e
+
+    backup_path = path + BACKUP_SUFFIX
+    try:
+        with open(backup_path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        if default is not _MISSING and isinstance(error, FileNotFoundError):
+            return default
+        raise error
+
+    log.warning("Could not read %s (%s); using the last good copy from %s", path, error, backup_path)
+    if restore:
+        write_json(path, data, backup=False)
+    return data
@@ -0,0 +1,106 @@
+import functools
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from diy_core.jsonfile import write_json
+
+def host_metrics_file(directory="."):
+    """This PC's metrics file; one per host, so PCs sharing a data folder do not overwrite each other's"""
+    return os.path.join(directory, f"metrics-{socket.gethostname() or 'unknown'}.json")
+
+
+# Upper bounds of the latency histogram buckets, in milliseconds; anything slower lands in a final overflow bucket
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class Metrics:
+    """Call counts and latency histograms for the app's expensive steps.
+
+    Timings can be recorded from any thread (image decoding and PDF builds
+    run off the Tk thread). ``snapshot`` gives per-step counts, totals and
+    approximate percentiles read off the histogram buckets.
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        ms = seconds * 1000
+        bucket = next((i for i, bound in enumerate(BUCKETS_MS) if ms <= bound), len(BUCKETS_MS))
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                             "buckets": [0] * (len(BUCKETS_MS) + 1)}
+            stats["count"] += 1
+            stats["total_ms"] += ms
+            stats["max_ms"] = max(stats["max_ms"], ms)
+            stats["buckets"][bucket] += 1
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """Decorator form of ``timer``"""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def snapshot(self):
+        with self._lock:
+            stats = {name: dict(entry, buckets=list(entry["buckets"])) for name, entry in self._stats.items()}
+
+        result = {}
+        for name, entry in sorted(stats.items()):
+            labels = [f"<={bound}ms" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+            result[name] = {
+                "count": entry["count"],
+                "total_ms": round(entry["total_ms"], 2),
+                "mean_ms": round(entry["total_ms"] / entry["count"], 2),
+                "p50_ms": self._percentile(entry, 0.5),
+                "p95_ms": self._percentile(entry, 0.95),
+                "max_ms": round(entry["max_ms"], 2),
+                "buckets": {label: n for label, n in zip(labels, entry["buckets"]) if n}
+            }
+        return result
+
+    @staticmethod
+    def _percentile(entry, fraction):
+        # The bucket's upper bound, capped at the slowest call actually seen
+        wanted = fraction * entry["count"]
+        seen = 0
+        for bound, n in zip(BUCKETS_MS + (None,), entry["buckets"]):
+            seen += n
+            if seen >= wanted:
+                return round(entry["max_ms"] if bound is None else min(bound, entry["max_ms"]), 2)
+        return round(entry["max_ms"], 2)
+
+    def summary_lines(self, limit=4):
+        """One short line per step, the steps with the most total time first"""
+        snapshot = self.snapshot()
+        names = sorted(snapshot, key=lambda name: snapshot[name]["total_ms"], reverse=True)[:limit]
+        return [f"{name}: {snapshot[name]['count']}x  p50 {snapshot[name]['p50_ms']:g}ms  "
+                f"p95 {snapshot[name]['p95_ms']:g}ms" for name in names]
+
+    def write(self, path):
+        """Write the snapshot to ``path`` as JSON, replacing the previous file in one step"""
+        data = {"written": time.strftime("%Y-%m-%d %H:%M:%S"), "host": socket.gethostname(), "pid": os.getpid(),
+                "metrics": self.snapshot()}
+        write_json(path, data, backup=False)
+
+
+# The app-wide instance the core modules and front ends record into
+metrics = Metrics()
@@ -0,0 +1,183 @@
+from diy_core.metrics import metrics
+from diy_core.pdf_stream import StreamingStory, flowables_height, rows_per_page
+from diy_core.report_diff import diff_summary, is_broken
+
+
+def render_inventory_report(report_data, filename, progress=None):
+    """Write the report PDF, generating the inventory table one page-sized chunk at a time.
+
+    ``progress`` is called with the fraction of rows laid out so far; the
+    export queue passes ``job.report_progress``, which is also where a
+    cancelled export stops. A report with a ``comparison`` (see
+    ReportService.export_comparison) ends with a table of its changes.
+    """
+    # Imported here rather than at the top so starting the app does not load ReportLab
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    doc = SimpleDocTemplate(filename, pagesize=A4)
+    styles = getSampleStyleSheet()
+
+    # Title
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#DC143C'),
+        spaceAfter=30,
+        alignment=1  # Center alignment
+    )
+
+    # Report info
+    info_style = ParagraphStyle(
+        'CustomInfo',
+        parent=styles['Normal'],
+        fontSize=12,
+        spaceAfter=10,
+        textColor=colors.HexColor('#333333')
+    )
+
+    heading = [
+        Paragraph("DIY LAB INVENTORY REPORT", title_style),
+        Paragraph(f"<b>Report Title:</b> DIY Lab Inventory Status", info_style),
+        Paragraph(f"<b>Generated By:</b> {report_data['generated_by']}", info_style),
+        Paragraph(f"<b>Generated Date:</b> {report_data['generated_date']}", info_style),
+        Spacer(1, 20)
+    ]
+
+    # Inventory table, emitted as one table per page with the header row repeated on each
+    header_row = ['Component Name', 'Qty in Hand', 'Working', 'Not Working', 'Reason']
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#DC143C')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ])
+
+    def make_table(rows):
+        table = Table([header_row] + rows, colWidths=[3 * inch, 0.8 * inch, 0.8 * inch, 0.8 * inch, 1.5 * inch],
+                      repeatRows=1)
+        table.setStyle(table_style)
+        return table
+
+    # SimpleDocTemplate's frame keeps 6pt of padding above and below its contents
+    frame_height = doc.height - 12
+    sample_row = ['Component', '0', '0', '0', 'Reason']
+    first_page_rows = rows_per_page(make_table, sample_row, doc.width,
+                                    frame_height - flowables_height(heading, doc.width, frame_height))
+    page_rows = rows_per_page(make_table, sample_row, doc.width, frame_height)
+
+    summary_style = ParagraphStyle(
+        'CustomSummary',
+        parent=styles['Normal'],
+        fontSize=12,
+        spaceAfter=5,
+        textColor=colors.HexColor('#DC143C'),
+        leftIndent=20
+    )
+
+    # Changes table: each changed field shows "before -> after"
+    changes_header_row = ['Component Name', 'Change', 'Qty in Hand', 'Working', 'Not Working', 'Reason']
+
+    def make_changes_table(rows):
+        table = Table([changes_header_row] + rows,
+                      colWidths=[2.2 * inch, 0.7 * inch, 0.8 * inch, 0.8 * inch, 0.8 * inch, 1.4 * inch], repeatRows=1)
+        table.setStyle(table_style)
+        return table
+
+    def change_cell(change, field, limit=None):
+        if field not in change['fields']:
+            return ''
+        before, after = ('' if value is None else str(value) for value in change['fields'][field])
+        if limit:
+            before, after = (value[:limit] + '...' if len(value) > limit else value for value in (before, after))
+        if change['kind'] != 'changed':
+            return after or before
+        return f"{before} -> {after}"
+
+    def comparison_flowables(comparison):
+        changes = comparison['changes']
+        summary = diff_summary(changes)
+        changes_page_rows = rows_per_page(make_changes_table, ['Component', 'changed', '0 -> 0', '0 -> 0', '0 -> 0',
+                                                               'Reason'], doc.width, frame_height)
+        title = "WHAT BROKE SINCE" if comparison.get('broken_only') else "CHANGES SINCE"
+        yield Paragraph(f"<b>{title} REPORT {comparison['report_id']}</b> ({comparison['generated_date']})",
+                        title_style)
+        yield Paragraph(f"Added: {summary['added']}    Removed: {summary['removed']}    "
+                        f"Changed: {summary['changed']}    More not working: {summary['broken']}", summary_style)
+        yield Spacer(1, 10)
+
+        rows = []
+        for component, change in changes.items():
+            rows.append([
+                component[:30] + '...' if len(component) > 30 else component,
+                'broke' if is_broken(change) and change['kind'] == 'changed' else change['kind'],
+                change_cell(change, 'quantity_in_hand'),
+                change_cell(change, 'number_working'),
+                change_cell(change, 'number_not_working'),
+                change_cell(change, 'reason', 8 if change['kind'] == 'changed' else 20)
+            ])
+            if len(rows) == changes_page_rows:
+                yield make_changes_table(rows)
+                rows = []
+        if rows:
+            yield make_changes_table(rows)
+        elif not changes:
+            yield Paragraph("No changes.", summary_style)
+
+    def flowables():
+        yield from heading
+
+        # Summary totals are added up in the same pass that builds the table rows
+        inventory_data = report_data['inventory_data']
+        total_qty = total_working = total_not_working = 0
+        rows = []
+        rows_done = 0
+        page_capacity = first_page_rows
+
+        for component, data in inventory_data.items():
+            rows.append([
+                component[:30] + '...' if len(component) > 30 else component,
+                str(data['quantity_in_hand']),
+                str(data['number_working']),
+                str(data['number_not_working']),
+                data['reason'][:20] + '...' if len(data['reason']) > 20 else data['reason']
+            ])
+            total_qty += data['quantity_in_hand']
+            total_working += data['number_working']
+            total_not_working += data['number_not_working']
+
+            if len(rows) == page_capacity:
+                yield make_table(rows)
+                rows_done += len(rows)
+                rows = []
+                page_capacity = page_rows
+                if progress:
+                    progress(rows_done / len(inventory_data))
+
+        if rows or not rows_done:
+            yield make_table(rows)
+        yield Spacer(1, 20)
+
+        # Summary
+        yield Paragraph("<b>SUMMARY:</b>", title_style)
+        yield Paragraph(f"Total Components: {len(inventory_data)}", summary_style)
+        yield Paragraph(f"Total Quantity: {total_qty}", summary_style)
+        yield Paragraph(f"Total Working: {total_working}", summary_style)
+        yield Paragraph(f"Total Not Working: {total_not_working}", summary_style)
+
+        if report_data.get('comparison') is not None:
+            yield Spacer(1, 20)
+            yield from comparison_flowables(report_data['comparison'])
+
+    # The story is generated while ReportLab lays it out, so only a few pages of rows exist at once
+    with metrics.timer("pdf.build"):
+        doc.build(StreamingStory(flowables()))
@@ -0,0 +1,41 @@
+class StreamingStory(list):
+    """A ReportLab story that pulls flowables from an iterable as the build consumes them.
+
+    BaseDocTemplate.build checks ``len(story)`` before laying out each
+    flowable, so topping the list up there keeps only ``lookahead``
+    flowables alive at a time instead of the whole document.
+    """
+
+    def __init__(self, flowables, lookahead=4):
+        super().__init__()
+        self.lookahead = lookahead
+        self._source = iter(flowables)
+        self._fill()
+
+    def _fill(self):
+        while self._source is not None and list.__len__(self) < self.lookahead:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+
+def flowables_height(flowables, width, height):
+    """Vertical space the given flowables take up when stacked in a frame"""
+    total = 0
+    for flowable in flowables:
+        total += flowable.wrap(width, height)[1] + flowable.getSpaceBefore() + flowable.getSpaceAfter()
+    return total
+
+
+def rows_per_page(make_table, sample_row, width, height):
+    """How many rows like ``sample_row`` fit in ``height`` below the table's header row"""
+    _, one_row = make_table([sample_row]).wrap(width, height)
+    _, two_rows = make_table([sample_row, sample_row]).wrap(width, height)
+    row_height = two_rows - one_row
+    header_height = one_row - row_height
+    return max(1, int((height - header_height) // row_height))
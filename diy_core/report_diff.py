@@ -0,0 +1,107 @@
+from diy_core.store import COMPONENT_FIELDS
+
+CHANGE_KINDS = ("added", "removed", "changed")
+
+
+def compare_inventories(old, new):
+    """Per-component changes from ``old`` to ``new``, joined on component name in one pass over each.
+
+    Returns ``{name: change}`` in ``new``'s order, then the components
+    ``new`` no longer has. A change is ``{"kind": "added" | "removed" |
+    "changed", "fields": {field: (before, after)}}`` listing only the fields
+    that differ. Only COMPONENT_FIELDS are compared, so save counters in a
+    live inventory do not show up as changes.
+    """
+    changes = {}
+    matched = 0
+    for name, data in new.items():
+        before = old.get(name)
+        if before is None:
+            changes[name] = {"kind": "added", "fields": {field: (None, data.get(field)) for field in COMPONENT_FIELDS}}
+            continue
+        matched += 1
+        fields = {field: (before.get(field), data.get(field)) for field in COMPONENT_FIELDS
+                  if before.get(field) != data.get(field)}
+        if fields:
+            changes[name] = {"kind": "changed", "fields": fields}
+
+    # Every old component was matched above unless some were removed
+    if matched < len(old):
+        for name, data in old.items():
+            if name not in new:
+                changes[name] = {"kind": "removed",
+                                 "fields": {field: (data.get(field), None) for field in COMPONENT_FIELDS}}
+    return changes
+
+
+def compare_reports(archive, old_id, new_id):
+    """Changes between two archived reports (see compare_inventories).
+
+    Reports stored as deltas on the same base only differ in the components
+    one of their deltas touches, so only those are compared and neither
+    report is rebuilt in full.
+    """
+    old_base, old_changed, old_removed = archive.delta(old_id)
+    new_base, new_changed, new_removed = archive.delta(new_id)
+    if old_base != new_base:
+        return compare_inventories(archive.get(old_id)["inventory_data"], archive.get(new_id)["inventory_data"])
+
+    touched = dict.fromkeys([*old_changed, *old_removed, *new_changed, *new_removed])
+    if not touched:
+        return {}
+    base = archive.base_inventory(old_base)
+    return compare_inventories(delta_view(base, old_changed, old_removed, touched),
+                               delta_view(base, new_changed, new_removed, touched))
+
+
+def delta_view(base, changed, removed, names):
+    """The components ``names`` of the report stored as ``changed``/``removed`` on ``base``"""
+    removed = set(removed)
+    view = {}
+    for name in names:
+        if name in changed:
+            view[name] = changed[name]
+        elif name in base and name not in removed:
+            view[name] = base[name]
+    return view
+
+
+def is_broken(change):
+    """True if the change raised the component's non-working count (or added it with some not working)"""
+    before, after = change["fields"].get("number_not_working", (None, None))
+    return after is not None and after > (before or 0)
+
+
+def diff_summary(changes):
+    """How many components were added, removed, changed and broken"""
+    summary = dict.fromkeys(CHANGE_KINDS + ("broken",), 0)
+    for change in changes.values():
+        summary[change["kind"]] += 1
+        summary["broken"] += is_broken(change)
+    return summary
+
+
+def find_report(entries, text, branch_name=None):
+    """The index entry ``text`` names: a report id such as ``#00012`` or ``12``, or a date.
+
+    A date (or a date and time, in the reports' ``YYYY-MM-DD HH:MM:SS``
+    form) picks the branch's first report generated on or after it, so
+    "2026-09-01" finds the report to compare against for "since term
+    start". With ``branch_name``, reports of other branches are never
+    returned, whether named by id or by date. Only the index entries are
+    read. Returns None when nothing matches.
+    """
+    text = text.strip()
+    by_id = text.lstrip("#").isdigit()
+    report_id = f"#{int(text.lstrip('#')):05d}" if by_id else None
+    for entry in entries:
+        if by_id and entry["report_id"] != report_id:
+            continue
+        if branch_name is not None and entry.get("branch_name") != branch_name:
+            # Report ids are unique, so an id naming another branch's report matches nothing
+            if by_id:
+                return None
+            continue
+        if by_id or entry.get("generated_date", "") >= text:
+            return entry
+    return None
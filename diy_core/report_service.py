@@ -0,0 +1,72 @@
+from datetime import datetime
+
+from diy_core.pdf_report import render_inventory_report
+from diy_core.report_diff import compare_inventories, compare_reports, is_broken
+
+
+class ReportService:
+    """Turns the current inventory into an archived report and a queued PDF export.
+
+    ``snapshot`` copies every component, so saves made while the PDF is
+    being built do not leak into it. Save counters (``version``) are left
+    out, as they mean nothing in a report. The archive and export queue are
+    optional; without them ``export`` only builds the report data.
+    ``compare`` and ``export_comparison`` need the archive.
+    """
+
+    def __init__(self, store, archive=None, exports=None, render=render_inventory_report):
+        self.store = store
+        self.archive = archive
+        self.exports = exports
+        self.render = render
+
+    def snapshot(self, generated_by, branch_name=None):
+        report_data = {
+            "generated_by": generated_by,
+            "generated_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "inventory_data": {name: {field: value for field, value in data.items() if field != "version"}
+                               for name, data in self.store.components().items()}
+        }
+        if branch_name is not None:
+            report_data["branch_name"] = branch_name
+        return report_data
+
+    def export(self, generated_by, branch_name=None):
+        """Archive a report of the inventory as it is now and queue its PDF; returns ``(report_data, job)``"""
+        report_data = self.snapshot(generated_by, branch_name)
+        if self.archive is not None:
+            report_data["report_id"] = self.archive.add(report_data)
+
+        job = None
+        if self.exports is not None:
+            filename = f"inventory_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+            job = self.exports.submit(filename, lambda path, job: self.render(report_data, path, job.report_progress))
+        return report_data, job
+
+    def compare(self, old_id, new_id=None):
+        """Per-component changes from archived report ``old_id`` to report ``new_id``, or to the inventory now"""
+        if new_id is None:
+            return compare_inventories(self.archive.get(old_id)["inventory_data"], self.store.components())
+        return compare_reports(self.archive, old_id, new_id)
+
+    def export_comparison(self, generated_by, against, report_id=None, branch_name=None, broken_only=False):
+        """Queue a PDF of report ``report_id``, or of the inventory now, ending with its changes since ``against``"""
+        # ``against`` is the older report's index entry; a PDF of the inventory now is not archived
+        if report_id is None:
+            report_data = self.snapshot(generated_by, branch_name)
+            changes = compare_inventories(self.archive.get(against["report_id"])["inventory_data"],
+                                          report_data["inventory_data"])
+        else:
+            report_data = self.archive.get(report_id)
+            changes = compare_reports(self.archive, against["report_id"], report_id)
+        if broken_only:
+            changes = {name: change for name, change in changes.items() if is_broken(change)}
+        report_data["comparison"] = {"report_id": against["report_id"],
+                                     "generated_date": against.get("generated_date", ""),
+                                     "broken_only": broken_only, "changes": changes}
+
+        job = None
+        if self.exports is not None:
+            filename = f"inventory_changes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+            job = self.exports.submit(filename, lambda path, job: self.render(report_data, path, job.report_progress))
+        return report_data, job
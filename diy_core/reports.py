@@ -0,0 +1,259 @@
+import json
+import os
+
+from diy_core.filelock import FileLock
+from diy_core.journal import file_size
+from diy_core.jsonfile import read_json, write_json
+from diy_core.metrics import metrics
+
+
+def diff_inventory(old, new):
+    """Return the components of ``new`` that differ from ``old``, and the names dropped from ``old``"""
+    changed = {name: dict(data) for name, data in new.items() if old.get(name) != data}
+    removed = [name for name in old if name not in new]
+    return changed, removed
+
+
+def copy_inventory(inventory):
+    return {name: dict(data) for name, data in inventory.items()}
+
+
+def delta_against_base(base_inventory, inventory, since_base, rebase_every):
+    """``(changed, removed)`` to store a report as a delta on its base, or None when it should start a new base"""
+    if base_inventory is None or since_base + 1 >= rebase_every:
+        return None
+    changed, removed = diff_inventory(base_inventory, inventory)
+    # A delta touching most of the catalog saves nothing over a full copy
+    if 2 * (len(changed) + len(removed)) > len(inventory):
+        return None
+    return changed, removed
+
+
+def delta_order(base_inventory, inventory, removed):
+    """``inventory``'s component names when applying its delta to the base would put them in another order, else None
+
+    Rebuilding keeps the base's order and appends added components at the
+    end, which is the report's own order unless components were inserted
+    elsewhere or moved; only then does the delta need to store the order.
+    """
+    removed = set(removed)
+    rebuilt = [name for name in base_inventory if name not in removed]
+    rebuilt += [name for name in inventory if name not in base_inventory]
+    names = list(inventory)
+    return None if names == rebuilt else names
+
+
+def in_order(inventory, order):
+    """``inventory`` with its components in ``order`` (a delta's stored order, or None to keep it as it is)"""
+    if order is None:
+        return inventory
+    return {name: inventory[name] for name in order}
+
+
+def report_totals(inventory):
+    """Component count and quantity totals of an inventory, in one pass"""
+    totals = {"components": 0, "quantity_in_hand": 0, "number_working": 0, "number_not_working": 0}
+    for data in inventory.values():
+        totals["components"] += 1
+        totals["quantity_in_hand"] += data.get("quantity_in_hand", 0)
+        totals["number_working"] += data.get("number_working", 0)
+        totals["number_not_working"] += data.get("number_not_working", 0)
+    return totals
+
+
+def read_legacy_reports(path):
+    """Yield ``(report_id, report)`` with full inventories from a reports.json in either earlier layout"""
+    data = read_json(path)
+
+    inventory = {}
+    for report_id, entry in data.get("reports", {}).items():
+        if "changed" in entry:
+            # Base-plus-deltas layout: each delta applies to the report before it
+            for name in entry["removed"]:
+                inventory.pop(name, None)
+            for name, component in entry["changed"].items():
+                inventory[name] = dict(component)
+        else:
+            inventory = copy_inventory(entry["inventory_data"])
+
+        report = {key: value for key, value in entry.items()
+                  if key not in ("base", "changed", "removed", "inventory_data")}
+        report["inventory_data"] = copy_inventory(inventory)
+        yield report_id, report
+
+
+class ReportArchive:
+    """Generated reports, one file each, plus a small append-only index.
+
+    ``index.jsonl`` has one line per report with its id, author, date,
+    branch, base and totals, so listing reports and allocating the next id
+    never open a report file. A report file holds either the full inventory
+    (a base) or only the components that differ from its base, so fetching
+    any report reads at most two files. Each branch has its own current
+    base, as branches keep separate inventories. A new base is started
+    every ``rebase_every`` reports of a branch, or when the changes would be
+    most of the catalog anyway.
+
+    On first use an existing reports.json (in either earlier layout) is
+    imported; the file itself is left where it is.
+
+    Several copies of the app can share the directory: ``add`` holds
+    ``index.lock`` and reads the index lines other copies appended before
+    picking the next id, and reads pick those lines up as well.
+    """
+
+    def __init__(self, directory="reports", legacy_path="reports.json", rebase_every=20):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.jsonl")
+        self.lock = FileLock(os.path.join(directory, "index.lock"))
+        self.legacy_path = legacy_path
+        self.rebase_every = rebase_every
+        self._index = None
+        # Bytes of index.jsonl already read
+        self._index_size = 0
+        self._next_id = 1
+        # branch name -> [current base id, reports since that base]
+        self._bases = {}
+        # (report id, inventory) of the base read last
+        self._base_cache = None
+
+    def _load(self, locked=False):
+        """Read the index lines added since the last call; ``locked`` when the caller holds the lock"""
+        if self._index is None:
+            self._index = {}
+            if not os.path.exists(self.index_path) and self.legacy_path and os.path.exists(self.legacy_path):
+                os.makedirs(self.directory, exist_ok=True)
+                with self.lock:
+                    # Another copy of the app may have imported it while this one waited
+                    if not os.path.exists(self.index_path):
+                        for report_id, report in read_legacy_reports(self.legacy_path):
+                            self._write(report_id, report)
+        if file_size(self.index_path) != self._index_size:
+            self._read_index(locked)
+
+    def _read_index(self, locked):
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_size)
+            for line in f:
+                # Same torn-line rule as the inventory journal: an unfinished last line was never committed
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                self._remember(entry)
+                self._index_size += len(line)
+            size = f.seek(0, os.SEEK_END)
+
+        # Without the lock an unfinished line may still be being written, so it is only cut off under it
+        if locked and self._index_size < size:
+            with open(self.index_path, "r+b") as f:
+                f.truncate(self._index_size)
+
+    def _remember(self, entry):
+        report_id = entry["report_id"]
+        self._index[report_id] = entry
+        self._next_id = max(self._next_id, int(report_id.lstrip("#")) + 1)
+        if entry["base"] == report_id:
+            self._bases[entry.get("branch_name")] = [report_id, 0]
+        else:
+            self._bases.setdefault(entry.get("branch_name"), [entry["base"], 0])[1] += 1
+
+    def _report_path(self, report_id):
+        return os.path.join(self.directory, report_id.lstrip("#") + ".json")
+
+    def _read_report(self, report_id):
+        with open(self._report_path(report_id), "r") as f, metrics.timer("report.load"):
+            return json.load(f)
+
+    def _base_inventory(self, base_id):
+        if self._base_cache is None or self._base_cache[0] != base_id:
+            self._base_cache = (base_id, self._read_report(base_id)["inventory_data"])
+        return self._base_cache[1]
+
+    def base_inventory(self, base_id):
+        """The full inventory of base report ``base_id``; shared with the archive, so not to be changed"""
+        self._load()
+        return self._base_inventory(base_id)
+
+    def _write(self, report_id, report_data):
+        inventory = report_data["inventory_data"]
+        entry = {key: value for key, value in report_data.items() if key != "inventory_data"}
+        entry["report_id"] = report_id
+        body = dict(entry)
+
+        base_id, since_base = self._bases.get(report_data.get("branch_name"), (None, 0))
+        base_inventory = self._base_inventory(base_id) if base_id is not None else None
+        delta = delta_against_base(base_inventory, inventory, since_base, self.rebase_every)
+        if delta is None:
+            entry["base"] = report_id
+            body["inventory_data"] = copy_inventory(inventory)
+        else:
+            entry["base"] = body["base"] = base_id
+            body["changed"], body["removed"] = delta
+            order = delta_order(base_inventory, inventory, body["removed"])
+            if order is not None:
+                body["order"] = order
+        entry["totals"] = report_totals(inventory)
+
+        os.makedirs(self.directory, exist_ok=True)
+        report_path = self._report_path(report_id)
+        with metrics.timer("report.dump"):
+            write_json(report_path, body, backup=False)
+
+        # The report only counts once its index line is on disk
+        line = (json.dumps(entry) + "\n").encode("utf-8")
+        with open(self.index_path, "ab") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._remember(entry)
+        self._index_size += len(line)
+        if entry["base"] == report_id:
+            self._base_cache = (report_id, body["inventory_data"])
+
+    def add(self, report_data):
+        """Record a generated report and return the id it was given"""
+        os.makedirs(self.directory, exist_ok=True)
+        with self.lock:
+            self._load(locked=True)
+            report_id = f"#{self._next_id:05d}"
+            self._write(report_id, report_data)
+        return report_id
+
+    def list_reports(self):
+        """Index entries (id, author, date, branch, totals) of every report, oldest first"""
+        self._load()
+        return [dict(entry) for entry in self._index.values()]
+
+    def delta(self, report_id):
+        """``(base_id, changed, removed)`` as the report is stored; a base has nothing changed or removed"""
+        self._load()
+        entry = self._index[report_id]
+        if entry["base"] == report_id:
+            return report_id, {}, []
+        body = self._read_report(report_id)
+        return entry["base"], body["changed"], body["removed"]
+
+    def get(self, report_id):
+        """Return a report in its original form, with the full ``inventory_data``"""
+        self._load()
+        entry = self._index[report_id]
+        body = self._read_report(report_id)
+
+        if entry["base"] == report_id:
+            inventory = body["inventory_data"]
+        else:
+            inventory = copy_inventory(self._read_report(entry["base"])["inventory_data"])
+            for name in body["removed"]:
+                inventory.pop(name, None)
+            for name, data in body["changed"].items():
+                inventory[name] = data
+            inventory = in_order(inventory, body.get("order"))
+
+        report = {key: value for key, value in body.items()
+                  if key not in ("base", "changed", "removed", "order", "inventory_data")}
+        report["inventory_data"] = inventory
+        return report
@@ -0,0 +1,185 @@
+import bisect
+import re
+
+from diy_core.metrics import metrics
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Filters offered next to the search box: key -> (label, test on a component's fields)
+SEARCH_FILTERS = {
+    "not_working": ("Not working > 0", lambda data: data.get("number_not_working", 0) > 0),
+    "out_of_stock": ("Quantity 0", lambda data: data.get("quantity_in_hand", 0) == 0),
+}
+
+
+def tokenize(text):
+    return _WORD.findall(text.lower())
+
+
+def component_tokens(name, data):
+    """The tokens a component can be found by: the words of its name and reason"""
+    return frozenset(tokenize(name) + tokenize(data.get("reason", "")))
+
+
+class InventoryIndex:
+    """Search index over component names and reasons, kept in step with saves.
+
+    Each word of a name or reason is a token. A query matches the
+    components that have, for every word typed, a token starting with it.
+    Tokens are kept sorted, so a prefix is a bisect plus a union of posting
+    sets, and the sets for recently typed prefixes are cached; typing one
+    more letter then only narrows a cached set. Filter matches are kept as
+    sets too and cost one intersection each. Results are in catalog order.
+    """
+
+    PREFIX_CACHE_SIZE = 64
+    # Below this many matches for a shorter prefix, filter those instead of walking the vocabulary
+    NARROW_LIMIT = 64
+
+    def __init__(self):
+        self._clear()
+        self._store = None
+        self._generation = None
+
+    def _clear(self):
+        self._names = []
+        self._positions = {}
+        self._tokens = {}
+        self._reasons = {}
+        self._postings = {}
+        self._vocabulary = []
+        self._filters = {key: set() for key in SEARCH_FILTERS}
+        self._prefix_cache = {}
+
+    def __len__(self):
+        return len(self._names)
+
+    def sync(self, store):
+        """Index ``store``'s components, or catch up with what changed if it is the store already indexed"""
+        inventory = store.components()
+        if store is self._store:
+            if store.generation != self._generation:
+                self._catch_up(inventory)
+                self._generation = store.generation
+            return
+        with metrics.timer("search.build"):
+            self._clear()
+            self._names = list(inventory)
+            for position, (name, data) in enumerate(inventory.items()):
+                self._positions[name] = position
+                self._reasons[position] = data.get("reason", "")
+                tokens = self._tokens[position] = component_tokens(name, data)
+                for token in tokens:
+                    postings = self._postings.get(token)
+                    if postings is None:
+                        postings = self._postings[token] = set()
+                    postings.add(position)
+                for key, (_, test) in SEARCH_FILTERS.items():
+                    if test(data):
+                        self._filters[key].add(position)
+            self._vocabulary = sorted(self._postings)
+        self._store = store
+        self._generation = store.generation
+
+    def _catch_up(self, inventory):
+        # Saved from another copy of the app: re-index only what a search or filter could see differently
+        with metrics.timer("search.catch_up"):
+            filters = [(self._filters[key], test) for key, (_, test) in SEARCH_FILTERS.items()]
+            for name, data in inventory.items():
+                position = self._positions.get(name)
+                if (position is None or self._reasons[position] != data.get("reason", "")
+                        or any(test(data) != (position in matches) for matches, test in filters)):
+                    self.update(name, data)
+
+    def saved(self, store, component_names):
+        """Re-index components just saved through ``store`` straight away.
+
+        Saves made elsewhere that the save picked up on the way are left to
+        the next ``sync``, which finds the generation moved on.
+        """
+        if store is not self._store:
+            self.sync(store)
+            return
+        inventory = store.components()
+        for name in component_names:
+            self.update(name, inventory[name])
+
+    def update(self, name, data):
+        """Add a component, or bring its entry up to date"""
+        position = self._positions.get(name)
+        if position is None:
+            position = self._positions[name] = len(self._names)
+            self._names.append(name)
+            old = frozenset()
+        else:
+            old = self._tokens[position]
+
+        self._reasons[position] = data.get("reason", "")
+        new = component_tokens(name, data)
+        if new != old:
+            for token in old - new:
+                self._remove_posting(token, position)
+            for token in new - old:
+                self._add_posting(token, position)
+            self._tokens[position] = new
+
+        for key, (_, test) in SEARCH_FILTERS.items():
+            if test(data):
+                self._filters[key].add(position)
+            else:
+                self._filters[key].discard(position)
+
+    def _add_posting(self, token, position):
+        postings = self._postings.get(token)
+        if postings is None:
+            postings = self._postings[token] = set()
+            bisect.insort(self._vocabulary, token)
+        postings.add(position)
+        self._forget_prefixes(token)
+
+    def _remove_posting(self, token, position):
+        postings = self._postings[token]
+        postings.discard(position)
+        if not postings:
+            del self._postings[token]
+            del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+        self._forget_prefixes(token)
+
+    def _forget_prefixes(self, token):
+        for prefix in [prefix for prefix in self._prefix_cache if token.startswith(prefix)]:
+            del self._prefix_cache[prefix]
+
+    def _matching(self, prefix):
+        """Positions of the components with a token starting with ``prefix``"""
+        positions = self._prefix_cache.get(prefix)
+        if positions is not None:
+            return positions
+
+        shorter = next((self._prefix_cache[prefix[:end]] for end in range(len(prefix) - 1, 0, -1)
+                        if prefix[:end] in self._prefix_cache), None)
+        if shorter is not None and len(shorter) <= self.NARROW_LIMIT:
+            positions = {position for position in shorter
+                         if any(token.startswith(prefix) for token in self._tokens[position])}
+        else:
+            positions = set()
+            vocabulary = self._vocabulary
+            for i in range(bisect.bisect_left(vocabulary, prefix), len(vocabulary)):
+                if not vocabulary[i].startswith(prefix):
+                    break
+                positions |= self._postings[vocabulary[i]]
+
+        if len(self._prefix_cache) >= self.PREFIX_CACHE_SIZE:
+            del self._prefix_cache[next(iter(self._prefix_cache))]
+        self._prefix_cache[prefix] = positions
+        return positions
+
+    def search(self, query="", filters=()):
+        """Names of the components matching every word of ``query`` and every filter key, in catalog order"""
+        with metrics.timer("search.query"):
+            sets = [self._matching(word) for word in tokenize(query)]
+            sets += [self._filters[key] for key in filters]
+            if not sets:
+                return list(self._names)
+            sets.sort(key=len)
+            matches = sets[0].intersection(*sets[1:])
+            return [self._names[position] for position in sorted(matches)]
@@ -0,0 +1,121 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+
+from diy_core.jsonfile import read_json, write_json
+
+# How long "stay signed in" lasts: one lab session
+SESSION_LIFETIME = 8 * 60 * 60
+
+# Bytes of the signing key; a shorter key file is treated as missing
+KEY_SIZE = 32
+
+
+def default_session_dir():
+    # Per PC and per account: the data folder itself may be shared between several PCs
+    return os.path.join(os.path.expanduser("~"), ".diy_inventory")
+
+
+class SessionStore:
+    """The login to resume on this PC, with a snapshot of the inventory screen as it was left.
+
+    ``start`` writes a token carrying the username, the data folder and an
+    expiry time, signed with a random key kept beside it (``session.key``,
+    made on first use). A token that was edited, copied from elsewhere,
+    made for another data folder or has expired is refused by ``resume``.
+    The snapshot is whatever the front end wants painted before the
+    inventory has loaded; it is not trusted for anything else.
+    """
+
+    def __init__(self, directory=None, data_dir=".", lifetime=SESSION_LIFETIME):
+        self.directory = directory or default_session_dir()
+        self.path = os.path.join(self.directory, "session.json")
+        self.key_path = os.path.join(self.directory, "session.key")
+        self.data_dir = os.path.abspath(data_dir)
+        self.lifetime = lifetime
+        self._key = None
+
+    def start(self, username):
+        """Remember ``username`` as logged in on this PC until the lifetime runs out"""
+        payload = {"username": username, "data_dir": self.data_dir, "expires": int(time.time() + self.lifetime)}
+        self._write({"token": self._sign(payload), "snapshot": {}})
+
+    def save_snapshot(self, snapshot):
+        """Keep ``snapshot`` with the current session; does nothing when there is none"""
+        session = self._read()
+        if session and self._verify(session.get("token", "")) is not None:
+            self._write({"token": session["token"], "snapshot": snapshot})
+
+    def resume(self):
+        """``(username, snapshot)`` of a still valid session, otherwise None"""
+        session = self._read()
+        if not session:
+            return None
+        payload = self._verify(session.get("token", ""))
+        if payload is None:
+            self.end()
+            return None
+        return payload["username"], session.get("snapshot") or {}
+
+    def end(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _read(self):
+        try:
+            session = read_json(self.path, default=None)
+        except ValueError:
+            # A damaged session file is just no session
+            return None
+        return session if isinstance(session, dict) else None
+
+    def _write(self, session):
+        os.makedirs(self.directory, exist_ok=True)
+        write_json(self.path, session, backup=False)
+
+    def _sign(self, payload):
+        body = base64.urlsafe_b64encode(json.dumps(payload, sort_keys=True).encode("utf-8")).decode("ascii")
+        return body + "." + hmac.new(self._secret(), body.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def _verify(self, token):
+        body, _, signature = str(token).rpartition(".")
+        expected = hmac.new(self._secret(), body.encode("utf-8"), hashlib.sha256).hexdigest()
+        if not body or not hmac.compare_digest(signature.encode("utf-8"), expected.encode("ascii")):
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(body.encode("utf-8")))
+        except ValueError:
+            return None
+        if payload.get("data_dir") != self.data_dir or payload.get("expires", 0) < time.time():
+            return None
+        return payload
+
+    def _secret(self):
+        if self._key is None:
+            try:
+                with open(self.key_path, "rb") as f:
+                    key = f.read()
+            except FileNotFoundError:
+                key = b""
+            if len(key) < KEY_SIZE:
+                # Missing, or cut short by a crash: an empty key would sign tokens anyone can forge
+                key = os.urandom(KEY_SIZE)
+                self._write_key(key)
+            self._key = key
+        return self._key
+
+    def _write_key(self, key):
+        # Written whole under a temporary name and renamed, so the key file is never left partly written
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.key_path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.key_path)
@@ -0,0 +1,533 @@
+"""SQLite storage for the inventory, users and report history.
+
+One database file holds all three, in WAL mode so readers never wait for
+a writer. Component saves update single rows, and reports keep the same
+base-plus-delta layout as ReportArchive, with indexes on report date and
+branch. ``python -m diy_core.sqlite_store`` imports the JSON files into a
+new database once; open_storage("sqlite") does the same automatically the
+first time it runs.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from diy_core.branches import BranchInventories, seed_branch
+from diy_core.jsonfile import read_json
+from diy_core.metrics import metrics
+from diy_core.passwords import PASSWORD_ITERATIONS, dummy_hash, hash_password, needs_rehash, verify_password
+from diy_core.reports import ReportArchive, delta_against_base, delta_order, in_order, report_totals
+from diy_core.store import COMPONENT_FIELDS, InventoryStore, check_versions, next_versions
+from diy_core.users import UsernameTaken, stored_password
+
+# Columns of the report_components table, in the order component dicts list them
+COMPONENT_COLUMNS = ("image_url",) + COMPONENT_FIELDS
+# The components table also keeps each component's save counter
+STORED_COLUMNS = COMPONENT_COLUMNS + ("version",)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS components (
+    name TEXT PRIMARY KEY,
+    image_url TEXT NOT NULL DEFAULT '',
+    quantity_in_hand INTEGER NOT NULL DEFAULT 0,
+    number_working INTEGER NOT NULL DEFAULT 0,
+    number_not_working INTEGER NOT NULL DEFAULT 0,
+    reason TEXT NOT NULL DEFAULT '',
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS branches (
+    key TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS branch_components (
+    branch TEXT NOT NULL,
+    name TEXT NOT NULL,
+    image_url TEXT NOT NULL DEFAULT '',
+    quantity_in_hand INTEGER NOT NULL DEFAULT 0,
+    number_working INTEGER NOT NULL DEFAULT 0,
+    number_not_working INTEGER NOT NULL DEFAULT 0,
+    reason TEXT NOT NULL DEFAULT '',
+    version INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (branch, name)
+);
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    teacher_name TEXT NOT NULL,
+    branch_name TEXT NOT NULL,
+    password TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS users_branch ON users (branch_name);
+CREATE TABLE IF NOT EXISTS reports (
+    seq INTEGER PRIMARY KEY,
+    report_id TEXT NOT NULL UNIQUE,
+    base_id TEXT NOT NULL,
+    generated_by TEXT,
+    generated_date TEXT,
+    branch_name TEXT,
+    totals TEXT NOT NULL,
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS reports_date ON reports (generated_date);
+CREATE INDEX IF NOT EXISTS reports_branch ON reports (branch_name);
+CREATE TABLE IF NOT EXISTS report_components (
+    report_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    image_url TEXT NOT NULL DEFAULT '',
+    quantity_in_hand INTEGER NOT NULL DEFAULT 0,
+    number_working INTEGER NOT NULL DEFAULT 0,
+    number_not_working INTEGER NOT NULL DEFAULT 0,
+    reason TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (report_id, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS report_removed (
+    report_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (report_id, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS report_order (
+    report_id TEXT PRIMARY KEY,
+    names TEXT NOT NULL
+);
+"""
+
+# Report fields that have their own column; anything else is kept in ``extra``
+REPORT_COLUMNS = ("generated_by", "generated_date", "branch_name")
+
+
+def component_row(name, data, columns=COMPONENT_COLUMNS):
+    return (name,) + tuple(data.get(column, "" if column in ("image_url", "reason") else 0) for column in columns)
+
+
+def component_dict(row, columns=COMPONENT_COLUMNS):
+    return dict(zip(columns, row))
+
+
+class SqliteDatabase:
+    """A connection to the database file, shared by the Tk thread and the workers.
+
+    Statements run one at a time under ``lock``, and ``execute`` fetches
+    every row before releasing it, so no thread reads from a cursor while
+    another one uses the connection.
+    """
+
+    def __init__(self, path="inventory.db"):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.lock = threading.RLock()
+        with self.lock:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            # Every committed save is on disk, as with the JSON journal
+            self.connection.execute("PRAGMA synchronous=FULL")
+            self.connection.execute("PRAGMA busy_timeout=5000")
+            self.connection.executescript(SCHEMA)
+            columns = {row[1] for row in self.connection.execute("PRAGMA table_info(components)")}
+            if "version" not in columns:
+                # Databases created before components had versions
+                self.connection.execute("ALTER TABLE components ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        self._depth = 0
+
+    def execute(self, sql, params=()):
+        """Run one statement and return all of its rows"""
+        with self.lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    def execute_one(self, sql, params=()):
+        """The first row of a query, or None"""
+        rows = self.execute(sql, params)
+        return rows[0] if rows else None
+
+    @contextmanager
+    def locked(self):
+        """A write transaction: other processes cannot write until it ends. Nested uses join the outer one."""
+        with self.lock:
+            outermost = self._depth == 0
+            if outermost:
+                self.connection.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield
+            except BaseException:
+                if outermost:
+                    self.connection.execute("ROLLBACK")
+                raise
+            finally:
+                self._depth -= 1
+            if outermost:
+                self.connection.execute("COMMIT")
+
+    def transaction(self, statements):
+        """Run ``(sql, params)`` pairs as one transaction; ``params`` may be a list of rows for executemany"""
+        with self.locked():
+            for sql, params in statements:
+                if isinstance(params, list):
+                    self.connection.executemany(sql, params)
+                else:
+                    self.connection.execute(sql, params)
+
+    def data_version(self):
+        """Changes whenever another connection commits, which is how external edits are noticed"""
+        return self.execute_one("PRAGMA data_version")[0]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+class SqliteInventoryStore:
+    """InventoryStore with the components table (or one branch's rows of branch_components) as storage.
+
+    Screens read from an in-memory copy, as with the JSON store, which is
+    reloaded when another process has committed to the database. Each save
+    is its own committed transaction, so there is never anything to flush.
+    Version checks run inside that transaction, where no other process can
+    write in between.
+    """
+
+    def __init__(self, db, branch=None):
+        self.db = db
+        self.branch = branch
+        self.inventory = None
+        self.generation = 0
+        self._version = None
+        if branch is None:
+            self._table, self._keys, self._key = "components", ("name",), ()
+        else:
+            self._table, self._keys, self._key = "branch_components", ("branch", "name"), (branch,)
+
+    @property
+    def loaded(self):
+        return self.inventory is not None
+
+    @property
+    def dirty(self):
+        return frozenset()
+
+    def load(self):
+        with metrics.timer("inventory.load"):
+            self._version = self.db.data_version()
+            where = " WHERE branch = ?" if self.branch is not None else ""
+            rows = self.db.execute("SELECT name, " + ", ".join(STORED_COLUMNS) + f" FROM {self._table}{where} "
+                                   "ORDER BY rowid", self._key)
+            self.inventory = {row[0]: component_dict(row[1:], STORED_COLUMNS) for row in rows}
+            self.generation += 1
+        return self.inventory
+
+    def components(self):
+        if not self.loaded:
+            return self.load()
+        self.refresh()
+        return self.inventory
+
+    def get(self, component_name):
+        return self.components()[component_name]
+
+    def _upsert(self, component_name, fields):
+        unknown = set(fields) - set(STORED_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown component fields: {', '.join(sorted(unknown))}")
+        data = dict(self.inventory.get(component_name, {}), **fields)
+        columns = self._keys + STORED_COLUMNS
+        return (f"INSERT INTO {self._table} (" + ", ".join(columns) + ") VALUES (" + ", ".join("?" * len(columns))
+                + ") ON CONFLICT (" + ", ".join(self._keys) + ") DO UPDATE SET "
+                + ", ".join(f"{field} = excluded.{field}" for field in fields),
+                self._key + component_row(component_name, data, STORED_COLUMNS))
+
+    def update(self, component_name, fields):
+        self.save_components({component_name: fields})
+
+    def save_component(self, component_name, fields, version=None):
+        versions = None if version is None else {component_name: version}
+        return self.save_components({component_name: fields}, versions)[component_name]
+
+    def save_components(self, changes, versions=None):
+        """Save several components in one transaction; returns their values from before the save"""
+        # Our own commits leave data_version alone, so only other processes' saves cause reloads
+        with self.db.locked():
+            inventory = self.components()
+            check_versions(inventory, versions or {})
+            previous = {component_name: dict(inventory[component_name]) for component_name in changes
+                        if component_name in inventory}
+            changes = next_versions(inventory, changes)
+            self.db.transaction([self._upsert(component_name, fields) for component_name, fields in changes.items()])
+        for component_name, fields in changes.items():
+            inventory.setdefault(component_name, {}).update(fields)
+        self.generation += 1
+        return previous
+
+    def is_stale(self):
+        return self.loaded and self.db.data_version() != self._version
+
+    def refresh(self):
+        if not self.is_stale():
+            return False
+        self.load()
+        return True
+
+    def take_problems(self):
+        return []
+
+    def flush(self, wait=True):
+        pass
+
+    def close(self):
+        pass
+
+
+class SqliteBranchInventories(BranchInventories):
+    """BranchInventories with the shards kept in branch_components and the registry in branches"""
+
+    def __init__(self, db, catalog):
+        super().__init__(catalog)
+        self.db = db
+
+    def names(self):
+        return dict(self.db.execute("SELECT key, name FROM branches ORDER BY rowid"))
+
+    def _open(self, key):
+        return SqliteInventoryStore(self.db, key)
+
+    def _create(self, key, branch_name):
+        with self.db.locked():
+            if self.db.execute_one("SELECT 1 FROM branches WHERE key = ?", (key,)):
+                return
+            claim = self.db.execute_one("SELECT 1 FROM branches LIMIT 1") is None
+            self._insert(key, branch_name, seed_branch(self.catalog.components(), claim))
+
+    def _insert(self, key, branch_name, inventory):
+        columns = ("branch", "name") + STORED_COLUMNS
+        self.db.transaction([
+            ("INSERT INTO branches (key, name) VALUES (?, ?)", (key, branch_name)),
+            (f"INSERT INTO branch_components ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+             [(key,) + component_row(name, data, STORED_COLUMNS) for name, data in inventory.items()]),
+        ])
+
+
+class SqliteUserStore:
+    """UserStore backed by the users table.
+
+    Logins are a primary-key lookup, so there is nothing to cache. The
+    password column holds the same salted hashes as users.json, and
+    plaintext passwords carried over from older files are rehashed on
+    their owner's first login.
+    """
+
+    def __init__(self, db, iterations=PASSWORD_ITERATIONS):
+        self.db = db
+        self.iterations = iterations
+
+    def ensure_file(self):
+        pass
+
+    def load(self):
+        with metrics.timer("users.load"):
+            rows = self.db.execute("SELECT username, teacher_name, branch_name, password FROM users")
+            return {row[0]: {"teacher_name": row[1], "branch_name": row[2], "password_hash": row[3]} for row in rows}
+
+    def get_user(self, username):
+        row = self.db.execute_one("SELECT teacher_name, branch_name FROM users WHERE username = ?", (username,))
+        return None if row is None else {"teacher_name": row[0], "branch_name": row[1]}
+
+    def authenticate(self, username, password):
+        with metrics.timer("users.authenticate"):
+            row = self.db.execute_one("SELECT teacher_name, branch_name, password FROM users WHERE username = ?",
+                                      (username,))
+            if row is None:
+                verify_password(password, dummy_hash(self.iterations))
+                return None
+            if not verify_password(password, row[2]):
+                return None
+            if needs_rehash(row[2], self.iterations):
+                # Only replaces the password it checked, in case the account changed in between
+                self.db.transaction([("UPDATE users SET password = ? WHERE username = ? AND password = ?",
+                                      (hash_password(password, self.iterations), username, row[2]))])
+            return {"teacher_name": row[0], "branch_name": row[1]}
+
+    def register(self, username, teacher_name, branch_name, password):
+        password_hash = hash_password(password, self.iterations)
+        try:
+            with metrics.timer("users.dump"):
+                self.db.transaction([("INSERT INTO users VALUES (?, ?, ?, ?)",
+                                      (username, teacher_name, branch_name, password_hash))])
+        except sqlite3.IntegrityError:
+            raise UsernameTaken(username)
+        return {"teacher_name": teacher_name, "branch_name": branch_name}
+
+
+class SqliteReportArchive:
+    """ReportArchive backed by the reports tables, with the same base-plus-delta layout"""
+
+    def __init__(self, db, rebase_every=20):
+        self.db = db
+        self.rebase_every = rebase_every
+        self._base_inventory = None
+
+    def _state(self, branch_name):
+        """``(next_seq, base_id, reports_since_base)``, with the base being the branch's current one"""
+        next_seq = self.db.execute_one("SELECT COALESCE(MAX(seq), 0) + 1 FROM reports")[0]
+        row = self.db.execute_one("SELECT base_id FROM reports WHERE branch_name IS ? ORDER BY seq DESC LIMIT 1",
+                                  (branch_name,))
+        if row is None:
+            return next_seq, None, 0
+        since_base = self.db.execute_one("SELECT COUNT(*) FROM reports WHERE base_id = ? AND report_id != base_id",
+                                         (row[0],))[0]
+        return next_seq, row[0], since_base
+
+    def _components(self, report_id):
+        rows = self.db.execute("SELECT name, " + ", ".join(COMPONENT_COLUMNS) + " FROM report_components "
+                               "WHERE report_id = ? ORDER BY position", (report_id,))
+        return {row[0]: component_dict(row[1:]) for row in rows}
+
+    def add(self, report_data):
+        # Inside the write transaction, so two processes cannot pick the same id
+        with self.db.locked():
+            seq, base_id, since_base = self._state(report_data.get("branch_name"))
+            report_id = f"#{seq:05d}"
+            self._insert(seq, report_id, report_data, base_id, since_base)
+        return report_id
+
+    def _insert(self, seq, report_id, report_data, base_id, since_base):
+        inventory = report_data["inventory_data"]
+        base_inventory = self.base_inventory(base_id) if base_id is not None else None
+
+        delta = delta_against_base(base_inventory, inventory, since_base, self.rebase_every)
+        order = None
+        if delta is None:
+            base_id = report_id
+            stored, removed = inventory, []
+        else:
+            stored, removed = delta
+            order = delta_order(base_inventory, inventory, removed)
+
+        extra = {key: value for key, value in report_data.items()
+                 if key not in REPORT_COLUMNS + ("inventory_data", "report_id")}
+        with metrics.timer("report.dump"):
+            self.db.transaction([
+                ("INSERT INTO reports (seq, report_id, base_id, generated_by, generated_date, branch_name, totals, "
+                 "extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                 (seq, report_id, base_id) + tuple(report_data.get(key) for key in REPORT_COLUMNS)
+                 + (json.dumps(report_totals(inventory)), json.dumps(extra))),
+                # position keeps the catalog order, which the PDF table follows
+                ("INSERT INTO report_components (report_id, position, name, " + ", ".join(COMPONENT_COLUMNS)
+                 + ") VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                 [(report_id, position) + component_row(name, data)
+                  for position, (name, data) in enumerate(stored.items())]),
+                ("INSERT INTO report_removed VALUES (?, ?)", [(report_id, name) for name in removed]),
+                ("INSERT INTO report_order VALUES (?, ?)", [(report_id, json.dumps(order))] if order else []),
+            ])
+        if base_id == report_id:
+            self._base_inventory = (report_id, {name: dict(data) for name, data in inventory.items()})
+
+    def list_reports(self):
+        """Index entries (id, author, date, branch, totals) of every report, oldest first"""
+        rows = self.db.execute("SELECT report_id, base_id, totals, extra, " + ", ".join(REPORT_COLUMNS)
+                               + " FROM reports ORDER BY seq")
+        return [self._entry(row) for row in rows]
+
+    def _entry(self, row):
+        entry = json.loads(row[3])
+        entry.update((key, value) for key, value in zip(REPORT_COLUMNS, row[4:]) if value is not None)
+        entry.update(report_id=row[0], base=row[1], totals=json.loads(row[2]))
+        return entry
+
+    def base_inventory(self, base_id):
+        if self._base_inventory is None or self._base_inventory[0] != base_id:
+            self._base_inventory = (base_id, self._components(base_id))
+        return self._base_inventory[1]
+
+    def delta(self, report_id):
+        row = self.db.execute_one("SELECT base_id FROM reports WHERE report_id = ?", (report_id,))
+        if row is None:
+            raise KeyError(report_id)
+        if row[0] == report_id:
+            return report_id, {}, []
+        removed = [name for (name,) in self.db.execute("SELECT name FROM report_removed WHERE report_id = ?",
+                                                      (report_id,))]
+        return row[0], self._components(report_id), removed
+
+    def get(self, report_id):
+        row = self.db.execute_one("SELECT report_id, base_id, totals, extra, " + ", ".join(REPORT_COLUMNS)
+                                  + " FROM reports WHERE report_id = ?", (report_id,))
+        if row is None:
+            raise KeyError(report_id)
+
+        with metrics.timer("report.load"):
+            entry = self._entry(row)
+            inventory = self._components(entry["base"])
+            if entry["base"] != report_id:
+                for (name,) in self.db.execute("SELECT name FROM report_removed WHERE report_id = ?", (report_id,)):
+                    inventory.pop(name, None)
+                inventory.update(self._components(report_id))
+                order = self.db.execute_one("SELECT names FROM report_order WHERE report_id = ?", (report_id,))
+                inventory = in_order(inventory, json.loads(order[0]) if order else None)
+
+        report = {key: value for key, value in entry.items() if key not in ("base", "totals")}
+        report["inventory_data"] = inventory
+        return report
+
+
+def migrate_json(db, data_dir="."):
+    """Copy inventory.json and the branch shards (with their journals), users.json and the report history
+    into an empty database"""
+    inventory_path = os.path.join(data_dir, "inventory.json")
+    if os.path.exists(inventory_path):
+        store = InventoryStore(inventory_path)
+        inventory = store.components()
+        db.transaction([("INSERT OR REPLACE INTO components VALUES (" + ", ".join("?" * (len(STORED_COLUMNS) + 1))
+                         + ")", [component_row(name, data, STORED_COLUMNS) for name, data in inventory.items()])])
+        store.close()
+
+    shards = BranchInventories(None, os.path.join(data_dir, "inventory"))
+    target = SqliteBranchInventories(db, None)
+    for key, branch_name in shards.names().items():
+        store = shards._open(key)
+        target._insert(key, branch_name, store.components())
+        store.close()
+
+    users = read_json(os.path.join(data_dir, "users.json"), default={})
+    db.transaction([("INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?)",
+                     [(username, user["teacher_name"], user["branch_name"], stored_password(user))
+                      for username, user in users.items()])])
+
+    archive = ReportArchive(os.path.join(data_dir, "reports"), legacy_path=os.path.join(data_dir, "reports.json"))
+    target = SqliteReportArchive(db)
+    for entry in archive.list_reports():
+        report = archive.get(entry["report_id"])
+        seq, base_id, since_base = target._state(report.get("branch_name"))
+        target._insert(int(entry["report_id"].lstrip("#")), entry["report_id"], report, base_id, since_base)
+
+
+def create_from_json(path, data_dir="."):
+    """Build the database at ``path`` from the JSON files, under a temporary name so a crash leaves no half import"""
+    tmp_path = path + ".tmp"
+    for leftover in (tmp_path, tmp_path + "-wal", tmp_path + "-shm"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+
+    db = SqliteDatabase(tmp_path)
+    try:
+        migrate_json(db, data_dir)
+    finally:
+        db.close()
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import the JSON data files into a new SQLite database")
+    parser.add_argument("database", nargs="?", default="inventory.db")
+    parser.add_argument("--data-dir", default=".", help="directory holding inventory.json and friends")
+    args = parser.parse_args()
+
+    if os.path.exists(args.database):
+        parser.error(f"{args.database} already exists")
+    create_from_json(args.database, args.data_dir)
+    db = SqliteDatabase(args.database)
+    counts = [db.execute_one(f"SELECT COUNT(*) FROM {table}")[0] for table in ("components", "users", "reports")]
+    db.close()
+    print("Imported {} components, {} users and {} reports into {}".format(*counts, args.database))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import os
+
+from diy_core.branches import BranchInventories, BranchTotals
+from diy_core.reports import ReportArchive
+from diy_core.store import InventoryStore
+from diy_core.users import UserStore
+
+BACKENDS = ("json", "sqlite")
+
+
+class Storage:
+    """The inventory, user and report stores of one backend, opened together.
+
+    Both backends offer the same operations, so the front ends and
+    ReportService do not care which one they were given. ``inventory`` is
+    the shared catalog; screens work on ``branches.store(branch_name)``,
+    and ``totals`` sums every branch for the all-branches view.
+    """
+
+    def __init__(self, backend, inventory, users, reports, branches, db=None):
+        self.backend = backend
+        self.inventory = inventory
+        self.users = users
+        self.reports = reports
+        self.branches = branches
+        self.totals = BranchTotals(branches)
+        self.db = db
+
+    def close(self):
+        self.branches.close()
+        self.inventory.close()
+        if self.db is not None:
+            self.db.close()
+
+
+def open_storage(backend="json", data_dir="."):
+    """Open the ``"json"`` files or the ``"sqlite"`` database in ``data_dir``.
+
+    The first time the SQLite backend is used, inventory.db is built from
+    the JSON files already there.
+    """
+    if backend == "json":
+        catalog = InventoryStore(os.path.join(data_dir, "inventory.json"))
+        return Storage("json", catalog, UserStore(os.path.join(data_dir, "users.json")),
+                       ReportArchive(os.path.join(data_dir, "reports"),
+                                     legacy_path=os.path.join(data_dir, "reports.json")),
+                       BranchInventories(catalog, os.path.join(data_dir, "inventory")))
+
+    if backend == "sqlite":
+        from diy_core.sqlite_store import (SqliteBranchInventories, SqliteDatabase, SqliteInventoryStore,
+                                           SqliteReportArchive, SqliteUserStore, create_from_json)
+
+        path = os.path.join(data_dir, "inventory.db")
+        if not os.path.exists(path):
+            create_from_json(path, data_dir)
+        db = SqliteDatabase(path)
+        catalog = SqliteInventoryStore(db)
+        return Storage("sqlite", catalog, SqliteUserStore(db), SqliteReportArchive(db),
+                       SqliteBranchInventories(db, catalog), db)
+
+    raise ValueError(f"Unknown storage backend {backend!r}; expected one of {', '.join(BACKENDS)}")
@@ -0,0 +1,168 @@
+from diy_core.journal import InventoryJournal
+
+
+# The fields a component row edits, in the order parse_component_fields takes them
+COMPONENT_FIELDS = ("quantity_in_hand", "number_working", "number_not_working", "reason")
+
+
+def parse_component_fields(quantity, working, not_working, reason):
+    """Turn the text typed into a component row into inventory fields; raises ValueError for non-numbers"""
+    return {
+        "quantity_in_hand": int(quantity or 0),
+        "number_working": int(working or 0),
+        "number_not_working": int(not_working or 0),
+        "reason": reason.strip()
+    }
+
+
+def collect_component_changes(inventory, edits):
+    """Validate edited row text for many components at once.
+
+    ``edits`` maps component names to ``{field: text}`` for the fields that
+    were changed. Returns ``(changes, errors)``: complete field dicts ready
+    for InventoryStore.save_components, and one message per component that
+    could not be parsed.
+    """
+    changes = {}
+    errors = []
+    for component_name, fields in edits.items():
+        data = inventory.get(component_name)
+        if data is None:
+            errors.append(f"{component_name}: no longer in the inventory")
+            continue
+
+        texts = [fields.get(field, str(data.get(field, ""))) for field in COMPONENT_FIELDS]
+        try:
+            changes[component_name] = parse_component_fields(*texts)
+        except ValueError:
+            errors.append(f"{component_name}: quantities must be whole numbers")
+    return changes, errors
+
+
+class EditConflict(Exception):
+    """Raised instead of saving when components were changed by someone else after editing began.
+
+    ``conflicts`` maps each such component to its values as now stored.
+    """
+
+    def __init__(self, conflicts):
+        super().__init__("Changed elsewhere: " + ", ".join(conflicts))
+        self.conflicts = conflicts
+
+
+def component_version(data):
+    """How many times a component has been saved; catalogs from before versions count as 0"""
+    return data.get("version", 0)
+
+
+def check_versions(inventory, versions):
+    """Raise EditConflict unless every component in ``versions`` is still at the version given there"""
+    conflicts = {component_name: dict(inventory.get(component_name, {}))
+                 for component_name, version in versions.items()
+                 if component_version(inventory.get(component_name, {})) != version}
+    if conflicts:
+        raise EditConflict(conflicts)
+
+
+def next_versions(inventory, changes):
+    """``changes`` with each component's version moved on by one"""
+    return {component_name: dict(fields, version=component_version(inventory.get(component_name, {})) + 1)
+            for component_name, fields in changes.items()}
+
+
+class InventoryStore:
+    """The one in-memory copy of inventory.json that every screen reads from.
+
+    The file is parsed once, on first use. Saves go through the journal and
+    mark the component dirty; inventory.json itself is only rewritten when
+    there is something dirty to write. Before serving reads the store checks
+    the file and the journal, so saves made by another copy of the app (or
+    an inventory.json replaced by hand) are picked up.
+
+    Every save moves the component's ``version`` on by one. Passing the
+    versions an edit started from makes the save check them first, so two
+    PCs editing the same component cannot silently overwrite each other.
+    """
+
+    def __init__(self, path="inventory.json", compact_after=200):
+        self.path = path
+        self.journal = InventoryJournal(path, compact_after=compact_after)
+
+    @property
+    def loaded(self):
+        return self.journal.inventory is not None
+
+    @property
+    def dirty(self):
+        """Names of components changed since inventory.json was last written"""
+        return frozenset(self.journal.dirty)
+
+    @property
+    def generation(self):
+        """A number that goes up whenever the inventory changes, here or elsewhere"""
+        return self.journal.generation
+
+    def load(self):
+        return self.journal.load()
+
+    def components(self):
+        """Return the inventory dict, loading or reloading it only when needed"""
+        if not self.loaded:
+            return self.load()
+        self.refresh()
+        return self.journal.inventory
+
+    def get(self, component_name):
+        return self.components()[component_name]
+
+    def update(self, component_name, fields):
+        self.save_components({component_name: fields})
+
+    def save_component(self, component_name, fields, version=None):
+        """Save a component's edited fields and return its values from before the save.
+
+        With ``version`` the save only happens if the component is still at
+        that version; otherwise EditConflict is raised.
+        """
+        versions = None if version is None else {component_name: version}
+        return self.save_components({component_name: fields}, versions)[component_name]
+
+    def save_components(self, changes, versions=None):
+        """Save several components in one journal record; returns their values from before the save.
+
+        ``versions`` maps components to the versions their edits started
+        from. If any has moved on, EditConflict is raised and nothing is saved.
+        """
+        if not self.loaded:
+            self.load()
+        with self.journal.locked() as inventory:
+            check_versions(inventory, versions or {})
+            previous = {component_name: dict(inventory[component_name]) for component_name in changes
+                        if component_name in inventory}
+            self.journal.update_many(next_versions(inventory, changes))
+        return previous
+
+    def is_stale(self):
+        """True when another copy of the app saved since this store last read or wrote"""
+        return self.loaded and self.journal.is_stale()
+
+    def refresh(self):
+        """Pick up saves made elsewhere; returns whether anything changed"""
+        if not self.is_stale():
+            return False
+        return self.journal.sync()
+
+    def take_problems(self):
+        """Messages about journal records discarded or compactions that failed since the last call"""
+        # The compaction thread may append meanwhile, so only what was copied is removed
+        problems = self.journal.problems[:]
+        del self.journal.problems[:len(problems)]
+        return problems
+
+    def flush(self, wait=True):
+        """Write dirty components back to inventory.json; does nothing when clean"""
+        if self.loaded and self.journal.dirty:
+            self.journal.compact(wait=wait)
+
+    def close(self):
+        self.journal.close()
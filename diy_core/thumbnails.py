@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import threading
+
+from diy_core.journal import file_signature
+from diy_core.jsonfile import write_json
+
+
+class ThumbnailStore:
+    """Pre-resized copies of the component images and logo, kept on disk.
+
+    Thumbnails are named after the source file's content hash and target
+    size, so they are rendered once and only rendered again when the source
+    actually changes. ``index.json`` remembers each source's hash against its
+    mtime and size, which means an unchanged source is not even re-read to
+    be hashed.
+    """
+
+    def __init__(self, directory="thumbnails", save_every=100):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.json")
+        self.save_every = save_every
+        self._index = None
+        self._unsaved = 0
+        self._lock = threading.Lock()
+
+    def _load_index(self):
+        if self._index is None:
+            try:
+                with open(self.index_path, "r") as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                # A missing or damaged index only costs a re-hash of each source
+                self._index = {}
+        return self._index
+
+    def save_index(self):
+        with self._lock:
+            if not self._unsaved:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            write_json(self.index_path, self._index, backup=False)
+            self._unsaved = 0
+
+    def content_hash(self, source_path):
+        """Return the source file's content hash, re-reading it only if its mtime or size changed"""
+        signature = file_signature(source_path)
+        if signature is None:
+            return None
+
+        key = os.path.abspath(source_path)
+        with self._lock:
+            entry = self._load_index().get(key)
+        if entry and (entry["mtime"], entry["size"]) == signature:
+            return entry["hash"]
+
+        digest = hashlib.sha1()
+        with open(source_path, "rb") as f:
+            for chunk in iter(lambda: f.read(65536), b""):
+                digest.update(chunk)
+        content_hash = digest.hexdigest()
+
+        with self._lock:
+            self._index[key] = {"mtime": signature[0], "size": signature[1], "hash": content_hash}
+            self._unsaved += 1
+            save_now = self._unsaved >= self.save_every
+        if save_now:
+            self.save_index()
+        return content_hash
+
+    def thumbnail_path(self, source_path, size):
+        """Return the path of a ``size`` thumbnail of ``source_path``, rendering it if needed"""
+        content_hash = self.content_hash(source_path)
+        if content_hash is None:
+            return None
+
+        width, height = size
+        path = os.path.join(self.directory, f"{content_hash}_{width}x{height}.png")
+        if not os.path.exists(path):
+            self._render(source_path, size, path)
+        return path
+
+    def _render(self, source_path, size, path):
+        from PIL import Image
+
+        image = Image.open(source_path)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        image = image.resize(size, Image.Resampling.LANCZOS)
+
+        # Written under a per-thread name and renamed, so readers never see half a PNG
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        image.save(tmp_path, "PNG")
+        os.replace(tmp_path, path)
+
+    def open(self, source_path, size):
+        """Return the thumbnail as a loaded PIL image, or None when the source does not exist"""
+        path = self.thumbnail_path(source_path, size)
+        if path is None:
+            return None
+
+        from PIL import Image
+
+        image = Image.open(path)
+        image.load()
+        return image
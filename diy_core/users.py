@@ -0,0 +1,113 @@
+import os
+
+from diy_core.filelock import FileLock
+from diy_core.journal import file_signature
+from diy_core.jsonfile import read_json, write_json
+from diy_core.metrics import metrics
+from diy_core.passwords import PASSWORD_ITERATIONS, dummy_hash, hash_password, needs_rehash, verify_password
+
+# What authenticate and register hand back: the account without its password hash
+PUBLIC_USER_FIELDS = ("teacher_name", "branch_name")
+
+
+class UsernameTaken(Exception):
+    """Raised by UserStore.register when the username is already registered"""
+
+
+def public_user(user):
+    return {field: user[field] for field in PUBLIC_USER_FIELDS}
+
+
+def stored_password(user):
+    """The account's password hash, or its plaintext password if it was saved before hashing"""
+    return user.get("password_hash", user.get("password"))
+
+
+class UserStore:
+    """Teacher accounts kept in users.json.
+
+    Accounts are kept in memory, keyed by username, and users.json is only
+    read again when its size or modification time changed, so an account
+    registered from another copy of the app can still log in straight
+    away. Passwords are stored as salted PBKDF2 hashes; plaintext ones from
+    older files are replaced by a hash the first time their owner logs in.
+    Checking a password is deliberately slow, so the front ends call
+    ``authenticate`` and ``register`` off the Tk thread. Registrations hold
+    ``users.json.lock`` so two of them cannot drop each other's account.
+    """
+
+    def __init__(self, path="users.json", iterations=PASSWORD_ITERATIONS):
+        self.path = path
+        self.iterations = iterations
+        self.lock = FileLock(path + ".lock")
+        self._users = None
+        self._signature = None
+
+    def ensure_file(self):
+        if not os.path.exists(self.path):
+            write_json(self.path, {}, backup=False)
+
+    def load(self):
+        """Every account by username, re-read only when users.json changed on disk"""
+        signature = file_signature(self.path)
+        if self._users is None or signature != self._signature:
+            with metrics.timer("users.load"):
+                self._users = read_json(self.path)
+            self._signature = signature
+        return self._users
+
+    def get_user(self, username):
+        """The account's public fields, or None if there is no such account"""
+        user = self.load().get(username)
+        return None if user is None else public_user(user)
+
+    def authenticate(self, username, password):
+        """Return the user's record if the password matches, otherwise None"""
+        with metrics.timer("users.authenticate"):
+            user = self.load().get(username)
+            if user is None:
+                verify_password(password, dummy_hash(self.iterations))
+                return None
+            stored = stored_password(user)
+            if not verify_password(password, stored):
+                return None
+            if needs_rehash(stored, self.iterations):
+                self._rehash(username, stored, password)
+            return public_user(user)
+
+    def _rehash(self, username, stored, password):
+        with self.lock:
+            users = self.load()
+            user = users.get(username)
+            # Left alone if the account changed since it was checked
+            if user is None or stored_password(user) != stored:
+                return
+            user.pop("password", None)
+            user["password_hash"] = hash_password(password, self.iterations)
+            self._write(users)
+
+    def register(self, username, teacher_name, branch_name, password):
+        password_hash = hash_password(password, self.iterations)
+        with self.lock:
+            users = self.load()
+            if username in users:
+                raise UsernameTaken(username)
+
+            users[username] = {
+                "teacher_name": teacher_name,
+                "branch_name": branch_name,
+                "password_hash": password_hash
+            }
+            self._write(users)
+        return public_user(users[username])
+
+    def _write(self, users):
+        # Written under the lock, so nobody else can have changed the file since it was read
+        try:
+            with metrics.timer("users.dump"):
+                write_json(self.path, users)
+        except BaseException:
+            # The cached accounts were already changed; read the file again next time
+            self._users = None
+            raise
+        self._signature = file_signature(self.path)
@@ -0,0 +1,29 @@
+import importlib
+import threading
+
+# Everything create_pdf_report pulls in; none of it is needed to show the login screen
+PDF_MODULES = (
+    "reportlab.lib.colors",
+    "reportlab.lib.pagesizes",
+    "reportlab.lib.styles",
+    "reportlab.lib.units",
+    "reportlab.platypus",
+)
+
+
+def prewarm(module_names=PDF_MODULES):
+    """Import ``module_names`` on a daemon thread, so their first real use finds them already loaded.
+
+    Failures are ignored here; a missing module still raises where it is
+    actually imported.
+    """
+    def run():
+        for name in module_names:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                pass
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,10 @@
+"""CustomTkinter widgets shared by both front ends"""
+
+from diy_ui.app import InventoryAppBase
+from diy_ui.image_cache import ThumbnailCache
+from diy_ui.image_loader import ImageLoader
+from diy_ui.screens import ScreenManager
+from diy_ui.toasts import ToastQueue
+from diy_ui.virtual_list import VirtualList
+
+__all__ = ["ImageLoader", "InventoryAppBase", "ScreenManager", "ThumbnailCache", "ToastQueue", "VirtualList"]
@@ -0,0 +1,1125 @@
+import abc
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import customtkinter as ctk
+
+from diy_core import (SEARCH_FILTERS, EditConflict, ExportQueue, InventoryIndex, ReportService, SessionStore,
+                      ThumbnailStore, UserStore, UsernameTaken, collect_component_changes, component_version,
+                      diff_summary, find_report, host_metrics_file, is_broken, metrics, open_storage,
+                      parse_component_fields, prewarm)
+from diy_ui.image_cache import ThumbnailCache
+from diy_ui.image_loader import ImageLoader
+from diy_ui.screens import ScreenManager
+from diy_ui.toasts import ToastQueue
+from diy_ui.virtual_list import VirtualList
+
+log = logging.getLogger(__name__)
+
+
+class InventoryAppBase(metaclass=abc.ABCMeta):
+    """The inventory app's screens and behaviour, shared by both front ends.
+
+    diy_inv.py and diy_app/main.py only differ in how they look: each
+    subclasses this and implements the abstract ``show_alert``,
+    ``build_login_screen``, ``build_register_screen`` and
+    ``build_component_row``, and may change the layout settings below.
+    Everything else (logging in, saving, exporting reports) lives here, so
+    it is written once.
+    """
+
+    # Row entry widgets and the inventory fields they edit
+    ROW_FIELDS = (
+        ("qty_entry", "quantity_in_hand"),
+        ("working_entry", "number_working"),
+        ("not_working_entry", "number_not_working"),
+        ("reason_entry", "reason")
+    )
+
+    # Border of a component row with edits that have not been saved yet
+    ROW_BORDER_COLOR = "#DC143C"
+    DIRTY_ROW_BORDER_COLOR = "#FFA000"
+
+    # Timings of the expensive steps are written here every METRICS_INTERVAL_MS, for looking at slow machines
+    METRICS_FILE = host_metrics_file()
+    METRICS_INTERVAL_MS = 60000
+
+    # Layout settings the front ends override
+    LOGO_PATH = "ORCHIDS.png"
+    FULLSCREEN = False
+    # Side padding of the lists and the bars above them, and the gap between list rows
+    LIST_PADX = 20
+    LIST_ROW_GAP = 10
+
+    # How often the inventory screen looks for saves made on other PCs
+    INVENTORY_POLL_MS = 3000
+
+    def __init__(self):
+        self.root = ctk.CTk()
+        self.root.title("DIY Lab Inventory Management")
+        self.root.geometry("1200x800")
+        self.root.configure(fg_color="#FFFFFF")
+
+        # Initialize data files; DIY_STORAGE=sqlite keeps everything in inventory.db instead,
+        # imported from these JSON files the first time
+        self.init_data_files()
+        self.storage = open_storage(os.environ.get("DIY_STORAGE", "json"))
+        self.user_store = self.storage.users
+
+        # Password checks are slow on purpose, so login and register run them here and the window keeps responding
+        self.auth_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="auth")
+        self.auth_pending = False
+
+        # Each branch has its own inventory, opened at login; it is parsed once and served from memory afterwards
+        self.inventory_store = None
+
+        # Words of component names and reasons, kept up to date on save so searching never rescans the inventory
+        self.search_index = InventoryIndex()
+
+        # Pre-resized images on disk, and decoded ones kept across screen rebuilds
+        self.thumbnail_store = ThumbnailStore("thumbnails")
+        self.thumbnail_cache = ThumbnailCache(max_bytes=32 * 1024 * 1024)
+
+        # Thumbnails are decoded off the Tk thread so rows can be shown before their images
+        self.image_loader = ImageLoader(self.root, self.thumbnail_cache, self.load_component_image,
+                                        self.make_component_image)
+
+        if self.FULLSCREEN:
+            self.root.attributes("-fullscreen", True)
+
+        # Reports are built one after another on a background thread, and archived under reports/
+        self.export_queue = ExportQueue()
+        self.report_archive = self.storage.reports
+        self.report_service = ReportService(self.inventory_store, self.report_archive, self.export_queue)
+        self.export_status_frame = None
+        self.watching_exports = False
+        # Set when the window was closed while exports were still running
+        self.close_pending = False
+
+        # Current user
+        self.current_user = None
+        self.current_user_data = None
+
+        # Load logo
+        self.load_logo()
+
+        # Each screen is built the first time it is shown and only hidden when another one is
+        self.screens = ScreenManager(self.root, fg_color="#FFFFFF")
+        self.screens.add("login", self.build_login_screen, self.refresh_login_screen)
+        self.screens.add("register", self.build_register_screen, self.refresh_register_screen)
+        self.screens.add("inventory", self.build_inventory_screen, self.refresh_inventory_screen)
+        self.screens.add("branch_totals", self.build_branch_totals_screen, self.refresh_branch_totals_screen)
+        self.screens.add("report_diff", self.build_report_diff_screen, self.refresh_report_diff_screen)
+        # The login the inventory screen was last filled for; a new one starts from an empty search
+        self.inventory_session = None
+
+        # Routine results appear in the corner of the window; show_alert is kept for errors
+        self.toasts = ToastQueue(self.root)
+
+        # ReportLab is only imported when a report is built; load it in the background once the login screen is up
+        self.root.after(1000, prewarm)
+
+        # F12 (or DIY_SHOW_METRICS=1) shows the step timings in the inventory header
+        self.show_metrics = os.environ.get("DIY_SHOW_METRICS") == "1"
+        self.metrics_label = None
+        self.metrics_after_id = None
+        self.inventory_poll_id = None
+        self.root.bind("<F12>", lambda e: self.toggle_metrics_overlay())
+        self.root.after(self.METRICS_INTERVAL_MS, self.write_metrics)
+
+        # "Stay signed in" reopens the inventory on the next launch; until its branch has loaded, the rows
+        # it was left on are painted from the session's snapshot (inventory_preview)
+        self.sessions = SessionStore()
+        self.inventory_preview = None
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
+        # Start with login screen, unless a kept session goes straight to the inventory
+        if not self.resume_session():
+            self.show_login_screen()
+
+    @metrics.timed("image.decode")
+    def load_component_image(self, image_path):
+        """Decode a component thumbnail; runs on the image loader's worker threads"""
+        # Reads the small pre-rendered thumbnail, not the full-size original
+        return self.thumbnail_store.open(image_path, (120, 80))
+
+    def make_component_image(self, component_image):
+        """Wrap a decoded thumbnail for display; runs on the Tk thread"""
+        return ctk.CTkImage(light_image=component_image, size=(120, 80))
+
+    def load_logo(self):
+        try:
+            logo_image = self.thumbnail_store.open(self.LOGO_PATH, (120, 120))
+            if logo_image is not None:
+                self.logo = ctk.CTkImage(light_image=logo_image, size=(120, 120))
+            else:
+                self.logo = None
+        except Exception as e:
+            print(f"Error loading logo: {e}")
+            self.logo = None
+
+    def init_data_files(self):
+        # Initialize users.json
+        UserStore("users.json").ensure_file()
+
+    @metrics.timed("screen.show")
+    def show_screen(self, name):
+        self.screens.show(name)
+
+    @staticmethod
+    def clear_entries(*entries):
+        for entry in entries:
+            entry.delete(0, "end")
+
+    def notify(self, message, kind="info", key=None):
+        """Report a routine result without a dialog; see ToastQueue for how repeats are folded together"""
+        self.toasts.show(message, kind, key)
+
+    def show_login_screen(self):
+        self.show_screen("login")
+
+    def build_stay_signed_in(self, parent):
+        """The "stay signed in" box of the login form"""
+        # Kept for SESSION_LIFETIME, so relaunching during the lab session skips this screen
+        self.stay_signed_in_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(parent, text="Stay signed in on this PC", variable=self.stay_signed_in_var,
+                        fg_color="#DC143C", hover_color="#B71C1C").pack(pady=(10, 0))
+
+    def refresh_login_screen(self):
+        # The form is reused, so nothing typed by the last teacher may still be in it
+        self.clear_entries(self.username_entry, self.password_entry)
+        self.stay_signed_in_var.set(False)
+
+    def show_register_screen(self):
+        self.show_screen("register")
+
+    def refresh_register_screen(self):
+        self.clear_entries(self.teacher_name_entry, self.branch_name_entry, self.reg_username_entry,
+                           self.reg_password_entry)
+
+    def login(self):
+        username = self.username_entry.get().strip()
+        password = self.password_entry.get().strip()
+
+        if not username or not password:
+            self.show_alert("Error", "Please enter both username and password")
+            return
+
+        if not self.auth_pending:
+            self.run_auth(self.user_store.authenticate, (username, password),
+                          lambda future: self.finish_login(future, username))
+
+    def finish_login(self, future, username):
+        try:
+            user = future.result()
+            if user is not None:
+                self.current_user = user["teacher_name"]
+                self.current_user_data = user
+                # A session kept from an earlier login is dropped unless this one asks to stay signed in too
+                if self.stay_signed_in_var.get():
+                    self.sessions.start(username)
+                else:
+                    self.sessions.end()
+                self.open_branch(user["branch_name"])
+                self.show_inventory_screen()
+            else:
+                self.show_alert("Error", "Invalid username or password")
+        except Exception as e:
+            self.show_alert("Error", f"Login failed: {str(e)}")
+
+    def register(self):
+        teacher_name = self.teacher_name_entry.get().strip()
+        branch_name = self.branch_name_entry.get().strip()
+        username = self.reg_username_entry.get().strip()
+        password = self.reg_password_entry.get().strip()
+
+        if not all([teacher_name, branch_name, username, password]):
+            self.show_alert("Error", "Please fill in all fields")
+            return
+
+        if not self.auth_pending:
+            self.run_auth(self.user_store.register, (username, teacher_name, branch_name, password),
+                          self.finish_register)
+
+    def finish_register(self, future):
+        try:
+            future.result()
+            self.notify("Registration successful! Please login.")
+            self.show_login_screen()
+        except UsernameTaken:
+            self.show_alert("Error", "Username already exists")
+        except Exception as e:
+            self.show_alert("Error", f"Registration failed: {str(e)}")
+
+    def run_auth(self, func, args, done):
+        """Call ``func(*args)`` on the auth worker, then ``done(future)`` back on the Tk thread"""
+        self.auth_pending = True
+        future = self.auth_worker.submit(func, *args)
+
+        def check():
+            if not future.done():
+                self.root.after(20, check)
+                return
+            self.auth_pending = False
+            done(future)
+        self.root.after(20, check)
+
+    def resume_session(self):
+        """Reopen the inventory for a kept login, painting the rows it was left on while the branch loads"""
+        try:
+            resumed = self.sessions.resume()
+            user = resumed and self.user_store.get_user(resumed[0])
+        except Exception as e:
+            print(f"Error resuming session: {e}")
+            return False
+        if not user:
+            return False
+
+        self.current_user = user["teacher_name"]
+        self.current_user_data = user
+        self.inventory_preview = resumed[1]
+        self.show_inventory_screen()
+        self.run_auth(self.load_branch, (user["branch_name"],), self.finish_resume)
+        return True
+
+    def load_branch(self, branch_name):
+        """Read and index a branch's inventory; runs on the auth worker while a resumed session is painted"""
+        self.search_index.sync(self.storage.branches.store(branch_name))
+
+    def finish_resume(self, future):
+        try:
+            future.result()
+            self.open_branch(self.current_user_data["branch_name"])
+        except Exception as e:
+            self.inventory_preview = None
+            self.sessions.end()
+            self.current_user = None
+            self.current_user_data = None
+            self.show_login_screen()
+            self.show_alert("Error", f"Login failed: {str(e)}")
+            return
+
+        # The whole list takes over at the row the session was left on; rows already painted are kept
+        page = list(self.inventory_preview.get("page", {}))
+        self.inventory_preview = None
+        # ...but first brought up to date, before reset releases any of them and compares them with the store
+        self.refresh_preview_rows()
+        self.search_terms = (self.search_entry.get(),
+                             [key for key, var in self.search_filter_vars.items() if var.get()])
+        self.inventory_names = self.search_index.search(*self.search_terms)
+        first = self.inventory_names.index(page[0]) if page and page[0] in self.inventory_names else 0
+        self.component_list.reset(len(self.inventory_names), first=first)
+        self.update_save_all_button()
+        self.show_search_count()
+        self.poll_inventory()
+
+    def refresh_preview_rows(self):
+        """Update the rows painted from the session snapshot that another PC has saved since it was taken.
+
+        Fields typed into a row while the inventory loaded are kept, and so is
+        the version the row was painted at, so saving them still checks for
+        the other PC's save; the other fields get the stored values.
+        """
+        inventory = self.inventory_store.components()
+        for row in self.component_list.visible_rows():
+            data = inventory.get(row["component_name"], {})
+            if row["version"] == component_version(data):
+                continue
+            edits = self.unsaved_edits.get(row["component_name"], {})
+            for entry_key, field in self.ROW_FIELDS:
+                if field not in edits:
+                    row[entry_key].delete(0, "end")
+                    row[entry_key].insert(0, str(data.get(field, "")))
+            if not edits:
+                row["version"] = component_version(data)
+            self.track_row_edits(row)
+
+    def inventory_ready(self):
+        """False, with a note saying so, while a resumed session is still loading its inventory"""
+        if self.inventory_preview is None:
+            return True
+        self.notify("Still loading the inventory...", key="loading")
+        return False
+
+    def component_data(self, component_name):
+        """A component's stored fields; taken from the session snapshot until the inventory has loaded"""
+        if self.inventory_preview is not None:
+            return self.inventory_preview.get("page", {}).get(component_name, {})
+        return self.inventory_store.components().get(component_name, {})
+
+    def open_branch(self, branch_name):
+        """Point the inventory screen and reports at the branch's own inventory"""
+        self.inventory_store = self.storage.branches.store(branch_name)
+        self.report_service.store = self.inventory_store
+
+    def logout(self):
+        if not self.inventory_ready():
+            return
+        self.sessions.end()
+        # Write back anything saved this session while the next teacher logs in
+        self.inventory_store.flush(wait=False)
+        # The inventory screen is kept for the next teacher, but not this one's unsaved edits
+        self.inventory_names = []
+        self.component_list.reset(0)
+        self.unsaved_edits = {}
+        self.edit_versions = {}
+        self.current_user = None
+        self.current_user_data = None
+        self.show_login_screen()
+
+    def show_inventory_screen(self):
+        self.show_screen("inventory")
+
+    def build_inventory_screen(self, main_frame):
+        # Header
+        header_frame = ctk.CTkFrame(main_frame, fg_color="#DC143C", height=80)
+        header_frame.pack(fill="x", padx=0, pady=0)
+        header_frame.pack_propagate(False)
+
+        if self.logo:
+            logo_label = ctk.CTkLabel(header_frame, image=self.logo, text="")
+            logo_label.pack(side="left", padx=20, pady=15)
+
+        self.inventory_title_label = ctk.CTkLabel(header_frame, text="", font=ctk.CTkFont(size=20, weight="bold"),
+                                                  text_color="white")
+        self.inventory_title_label.pack(side="left", padx=20, pady=15)
+
+        # Step timings, hidden unless the metrics overlay is switched on
+        self.metrics_label = ctk.CTkLabel(header_frame, text="", text_color="white", justify="left",
+                                          font=ctk.CTkFont(family="Courier", size=10))
+        if self.show_metrics:
+            self.metrics_label.pack(side="left", padx=10)
+
+        # Button frame
+        button_frame = ctk.CTkFrame(header_frame, fg_color="transparent")
+        button_frame.pack(side="right", padx=20, pady=15)
+
+        # Saves every edited row at once; its label counts the rows with unsaved edits
+        self.save_all_button = ctk.CTkButton(button_frame, text="SAVE ALL", command=self.save_all_edits,
+                                             fg_color="white", text_color="#DC143C", hover_color="#f0f0f0", width=110)
+        self.save_all_button.pack(side="left", padx=(0, 10))
+
+        generate_button = ctk.CTkButton(button_frame, text="EXPORT TO PDF", command=self.generate_and_export_report,
+                                        fg_color="white", text_color="#DC143C", hover_color="#f0f0f0", width=120)
+        generate_button.pack(side="left", padx=(0, 10))
+
+        branches_button = ctk.CTkButton(button_frame, text="ALL BRANCHES", command=self.show_branch_totals_screen,
+                                        fg_color="white", text_color="#DC143C", hover_color="#f0f0f0", width=110)
+        branches_button.pack(side="left", padx=(0, 10))
+
+        compare_button = ctk.CTkButton(button_frame, text="COMPARE", command=self.show_report_diff_screen,
+                                       fg_color="white", text_color="#DC143C", hover_color="#f0f0f0", width=90)
+        compare_button.pack(side="left", padx=(0, 10))
+
+        logout_button = ctk.CTkButton(button_frame, text="LOGOUT", command=self.logout,
+                                      fg_color="white", text_color="#DC143C", hover_color="#f0f0f0", width=80)
+        logout_button.pack(side="left")
+
+        # Export progress, shown while reports are being generated in the background
+        self.export_status_frame = ctk.CTkFrame(header_frame, fg_color="transparent")
+        self.export_status_label = ctk.CTkLabel(self.export_status_frame, text="", text_color="white",
+                                                font=ctk.CTkFont(size=12))
+        self.export_status_label.pack(anchor="w")
+        self.export_progress = ctk.CTkProgressBar(self.export_status_frame, width=160, progress_color="white")
+        self.export_progress.pack(side="left")
+        cancel_button = ctk.CTkButton(self.export_status_frame, text="CANCEL", command=self.cancel_export,
+                                      fg_color="white", text_color="#DC143C", hover_color="#f0f0f0",
+                                      width=60, height=24)
+        cancel_button.pack(side="left", padx=(10, 0))
+
+        # Search box and filters narrow the list below
+        search_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
+        search_frame.pack(fill="x", padx=self.LIST_PADX, pady=(20, 0))
+        self.search_entry = ctk.CTkEntry(search_frame, placeholder_text="Search components or reasons", width=320)
+        self.search_entry.pack(side="left")
+        self.search_entry.bind("<KeyRelease>", lambda e: self.apply_search())
+        self.search_filter_vars = {}
+        for key, (label, _) in SEARCH_FILTERS.items():
+            self.search_filter_vars[key] = ctk.BooleanVar(value=False)
+            ctk.CTkCheckBox(search_frame, text=label, variable=self.search_filter_vars[key], command=self.apply_search,
+                            fg_color="#DC143C", hover_color="#B01030").pack(side="left", padx=(20, 0))
+        self.search_count_label = ctk.CTkLabel(search_frame, text="", text_color="#666666")
+        self.search_count_label.pack(side="right")
+        self.search_terms = ("", [])
+
+        # Virtualized list: only the rows in and near the viewport exist as widgets; refresh fills it
+        self.inventory_names = []
+        self.unsaved_edits = {}
+        # Version of each edited component when its edits began, checked when they are saved
+        self.edit_versions = {}
+
+        # Rows are keyed by component, so narrowing a search keeps the rows that still match
+        self.component_list = VirtualList(main_frame, self.create_component_row, self.fill_component_row,
+                                          release_row=self.release_component_row,
+                                          item_key=lambda index: self.inventory_names[index],
+                                          row_gap=self.LIST_ROW_GAP, fg_color="white")
+        self.component_list.pack(fill="both", expand=True, padx=self.LIST_PADX, pady=20)
+        self.inventory_error_label = ctk.CTkLabel(main_frame, text="", text_color="#DC143C",
+                                                  font=ctk.CTkFont(size=16))
+
+    def refresh_inventory_screen(self):
+        """Bring the kept inventory screen up to date for the teacher now logged in"""
+        self.inventory_title_label.configure(text=f"INVENTORY - Welcome, {self.current_user}")
+        self.update_export_status()
+        self.update_metrics_overlay()
+        try:
+            # Back from another screen of the same login, the list, search and edits stay as they were
+            if self.inventory_session is not self.current_user_data:
+                self.clear_entries(self.search_entry)
+                for var in self.search_filter_vars.values():
+                    var.set(False)
+                self.search_terms = ("", [])
+                if self.inventory_preview is not None:
+                    # Resumed: the search and rows the session was left on, until the inventory has loaded
+                    if self.inventory_preview.get("search"):
+                        self.search_entry.insert(0, self.inventory_preview["search"])
+                    for key in self.inventory_preview.get("filters", []):
+                        if key in self.search_filter_vars:
+                            self.search_filter_vars[key].set(True)
+                    self.inventory_names = list(self.inventory_preview.get("page", {}))
+                else:
+                    self.search_index.sync(self.inventory_store)
+                    self.inventory_names = self.search_index.search()
+                self.component_list.reset(len(self.inventory_names))
+                self.inventory_session = self.current_user_data
+            self.update_save_all_button()
+            self.show_search_count()
+            self.inventory_error_label.pack_forget()
+            self.component_list.pack(fill="both", expand=True, padx=self.LIST_PADX, pady=20)
+            self.poll_inventory()
+
+        except Exception as e:
+            self.inventory_session = None
+            self.component_list.pack_forget()
+            self.inventory_error_label.configure(text=f"Error loading inventory: {str(e)}")
+            self.inventory_error_label.pack(pady=50)
+
+    def apply_search(self):
+        """Narrow the list to the components matching the search box and the ticked filters"""
+        # While a resumed session loads, finish_resume applies whatever has been typed by then
+        if self.inventory_preview is not None:
+            return
+        terms = (self.search_entry.get(), [key for key, var in self.search_filter_vars.items() if var.get()])
+        # Keys such as arrows and Shift also end up here; only a changed search needs the list redone
+        if terms == self.search_terms:
+            return
+        self.search_terms = terms
+
+        self.search_index.sync(self.inventory_store)
+        self.inventory_names = self.search_index.search(*terms)
+        self.component_list.reset(len(self.inventory_names))
+        self.show_search_count()
+
+    def show_search_count(self):
+        total = len(self.search_index)
+        if self.inventory_preview is not None:
+            text = "Loading inventory..."
+        elif len(self.inventory_names) == total:
+            text = f"{total} component{'s' if total != 1 else ''}"
+        else:
+            text = f"{len(self.inventory_names)} of {total} components"
+        self.search_count_label.configure(text=text)
+
+    def show_branch_totals_screen(self):
+        """Read-only counts of every component summed over all branches"""
+        if self.inventory_ready():
+            self.show_screen("branch_totals")
+
+    def build_branch_totals_screen(self, main_frame):
+        header_frame = ctk.CTkFrame(main_frame, fg_color="#DC143C", height=80)
+        header_frame.pack(fill="x", padx=0, pady=0)
+        header_frame.pack_propagate(False)
+
+        self.branch_totals_title_label = ctk.CTkLabel(header_frame, text="",
+                                                      font=ctk.CTkFont(size=20, weight="bold"), text_color="white")
+        self.branch_totals_title_label.pack(side="left", padx=20, pady=15)
+
+        back_button = ctk.CTkButton(header_frame, text="BACK", command=self.show_inventory_screen,
+                                    fg_color="white", text_color="#DC143C", hover_color="#f0f0f0", width=80)
+        back_button.pack(side="right", padx=20, pady=15)
+
+        self.branch_totals = {}
+        self.branch_total_names = []
+        self.totals_list = VirtualList(main_frame, self.create_totals_row, self.fill_totals_row,
+                                       row_gap=self.LIST_ROW_GAP, fg_color="white")
+        self.totals_list.pack(fill="both", expand=True, padx=self.LIST_PADX, pady=20)
+
+    def refresh_branch_totals_screen(self):
+        # Only the branches that changed since the last visit are summed again
+        try:
+            with metrics.timer("branches.totals"):
+                self.branch_totals = self.storage.totals.refresh()
+            branch_count = len(self.storage.branches.names())
+        except Exception as e:
+            self.branch_totals = {}
+            branch_count = 0
+            self.show_alert("Error", f"Failed to load branch totals: {str(e)}")
+        self.branch_total_names = list(self.branch_totals)
+
+        branches_text = f"{branch_count} branch{'es' if branch_count != 1 else ''}"
+        self.branch_totals_title_label.configure(text=f"ALL BRANCHES - {branches_text}")
+        self.totals_list.reset(len(self.branch_total_names))
+
+    def create_totals_row(self, parent):
+        frame = ctk.CTkFrame(parent, fg_color="#f8f8f8", corner_radius=10, border_width=1,
+                             border_color=self.ROW_BORDER_COLOR, height=60)
+        frame.pack_propagate(False)
+        name_label = ctk.CTkLabel(frame, text="", font=ctk.CTkFont(size=14, weight="bold"), text_color="#DC143C")
+        name_label.pack(side="left", padx=15)
+        counts_label = ctk.CTkLabel(frame, text="", font=ctk.CTkFont(size=13), text_color="#333333")
+        counts_label.pack(side="right", padx=15)
+        return {"frame": frame, "name_label": name_label, "counts_label": counts_label}
+
+    def fill_totals_row(self, row, index):
+        component_name = self.branch_total_names[index]
+        totals = self.branch_totals[component_name]
+        row["name_label"].configure(text=component_name)
+        row["counts_label"].configure(
+            text=f"In hand {totals['quantity_in_hand']}    Working {totals['number_working']}    "
+                 f"Not working {totals['number_not_working']}    ({totals['branches']} branch"
+                 f"{'es' if totals['branches'] != 1 else ''})")
+
+    def show_report_diff_screen(self):
+        """Per-component changes between two archived reports, or between one and the inventory now"""
+        if self.inventory_ready():
+            self.show_screen("report_diff")
+
+    def build_report_diff_screen(self, main_frame):
+        header_frame = ctk.CTkFrame(main_frame, fg_color="#DC143C", height=80)
+        header_frame.pack(fill="x", padx=0, pady=0)
+        header_frame.pack_propagate(False)
+
+        title_label = ctk.CTkLabel(header_frame, text="COMPARE REPORTS", font=ctk.CTkFont(size=20, weight="bold"),
+                                   text_color="white")
+        title_label.pack(side="left", padx=20, pady=15)
+
+        back_button = ctk.CTkButton(header_frame, text="BACK", command=self.show_inventory_screen,
+                                    fg_color="white", text_color="#DC143C", hover_color="#f0f0f0", width=80)
+        back_button.pack(side="right", padx=20, pady=15)
+
+        export_button = ctk.CTkButton(header_frame, text="EXPORT TO PDF", command=self.export_report_diff,
+                                      fg_color="white", text_color="#DC143C", hover_color="#f0f0f0", width=120)
+        export_button.pack(side="right", pady=15)
+
+        # A date instead of a report number means the branch's first report since then, e.g. the start of term
+        compare_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
+        compare_frame.pack(fill="x", padx=self.LIST_PADX, pady=(20, 0))
+        self.diff_from_entry = ctk.CTkEntry(compare_frame, placeholder_text="From: report # or date (YYYY-MM-DD)",
+                                            width=260)
+        self.diff_from_entry.pack(side="left")
+        self.diff_to_entry = ctk.CTkEntry(compare_frame, placeholder_text="To: report # (empty for now)", width=220)
+        self.diff_to_entry.pack(side="left", padx=(10, 0))
+        for entry in (self.diff_from_entry, self.diff_to_entry):
+            entry.bind("<Return>", lambda e: self.compare_selected_reports())
+        self.diff_broken_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(compare_frame, text="Only what broke", variable=self.diff_broken_var,
+                        command=self.show_report_diff, fg_color="#DC143C", hover_color="#B01030").pack(side="left",
+                                                                                                      padx=(20, 0))
+        compare_button = ctk.CTkButton(compare_frame, text="COMPARE", command=self.compare_selected_reports,
+                                       fg_color="#DC143C", hover_color="#B71C1C", width=100)
+        compare_button.pack(side="left", padx=(20, 0))
+        self.diff_summary_label = ctk.CTkLabel(compare_frame, text="", text_color="#666666")
+        self.diff_summary_label.pack(side="right")
+
+        # The comparison shown: changes by component name, and the index entries of its two reports
+        self.report_diff = {}
+        self.report_diff_against = None
+        self.report_diff_to = None
+        self.report_diff_names = []
+        # The login the screen was last filled for; a new one starts from its branch's first report
+        self.report_diff_session = None
+        self.diff_list = VirtualList(main_frame, self.create_diff_row, self.fill_diff_row, row_gap=self.LIST_ROW_GAP,
+                                     fg_color="white")
+        self.diff_list.pack(fill="both", expand=True, padx=self.LIST_PADX, pady=20)
+
+    def refresh_report_diff_screen(self):
+        if self.report_diff_session is not self.current_user_data:
+            self.report_diff_session = self.current_user_data
+            self.clear_entries(self.diff_from_entry, self.diff_to_entry)
+            self.diff_broken_var.set(False)
+            try:
+                # An empty date matches the branch's first report
+                first = find_report(self.report_archive.list_reports(), "", self.current_user_data["branch_name"])
+            except Exception as e:
+                print(f"Error listing reports: {e}")
+                first = None
+            if first is not None:
+                self.diff_from_entry.insert(0, first["report_id"])
+        self.compare_selected_reports()
+
+    def compare_selected_reports(self):
+        """Compare the reports named in the From and To boxes, To being the inventory now when left empty"""
+        self.report_diff = {}
+        self.report_diff_against = self.report_diff_to = None
+        from_text, to_text = self.diff_from_entry.get().strip(), self.diff_to_entry.get().strip()
+        try:
+            if from_text:
+                # Only the report index is scanned to find them; the comparison reads at most the two reports
+                entries = self.report_archive.list_reports()
+                branch_name = self.current_user_data["branch_name"]
+                against = find_report(entries, from_text, branch_name)
+                to = find_report(entries, to_text, branch_name) if to_text else None
+                if against is None or (to_text and to is None):
+                    self.notify(f"No report matches \"{to_text if against else from_text}\"", kind="warning")
+                else:
+                    with metrics.timer("reports.compare"):
+                        self.report_diff = self.report_service.compare(against["report_id"],
+                                                                       to["report_id"] if to else None)
+                    self.report_diff_against, self.report_diff_to = against, to
+        except Exception as e:
+            self.show_alert("Error", f"Failed to compare reports: {str(e)}")
+        self.show_report_diff()
+
+    def show_report_diff(self):
+        """List the comparison's changes, or only the components with more not working if so ticked"""
+        if self.diff_broken_var.get():
+            self.report_diff_names = [name for name, change in self.report_diff.items() if is_broken(change)]
+        else:
+            self.report_diff_names = list(self.report_diff)
+
+        if self.report_diff_against is None:
+            text = "Pick a report to compare against"
+        else:
+            summary = diff_summary(self.report_diff)
+            to_text = self.report_diff_to["report_id"] if self.report_diff_to else "now"
+            text = (f"{self.report_diff_against['report_id']} -> {to_text}:  {summary['added']} added, "
+                    f"{summary['removed']} removed, {summary['changed']} changed, {summary['broken']} broke")
+        self.diff_summary_label.configure(text=text)
+        self.diff_list.reset(len(self.report_diff_names))
+
+    def create_diff_row(self, parent):
+        frame = ctk.CTkFrame(parent, fg_color="#f8f8f8", corner_radius=10, border_width=1,
+                             border_color=self.ROW_BORDER_COLOR, height=60)
+        frame.pack_propagate(False)
+        name_label = ctk.CTkLabel(frame, text="", font=ctk.CTkFont(size=14, weight="bold"), text_color="#DC143C")
+        name_label.pack(side="left", padx=15)
+        change_label = ctk.CTkLabel(frame, text="", font=ctk.CTkFont(size=13))
+        change_label.pack(side="right", padx=15)
+        return {"frame": frame, "name_label": name_label, "change_label": change_label}
+
+    def fill_diff_row(self, row, index):
+        component_name = self.report_diff_names[index]
+        change = self.report_diff[component_name]
+        row["name_label"].configure(text=component_name)
+        row["change_label"].configure(text=self.describe_change(change),
+                                      text_color="#DC143C" if is_broken(change) else "#333333")
+
+    def export_report_diff(self):
+        """Queue a PDF of the newer report (or the inventory now) ending with the changes shown"""
+        if self.report_diff_against is None:
+            self.notify("Pick a report to compare against first", kind="warning")
+            return
+        try:
+            self.report_service.export_comparison(self.current_user, self.report_diff_against,
+                                                  self.report_diff_to["report_id"] if self.report_diff_to else None,
+                                                  self.current_user_data["branch_name"], self.diff_broken_var.get())
+            if not self.watching_exports:
+                self.watch_exports()
+
+        except Exception as e:
+            self.show_alert("Error", f"Failed to export report: {str(e)}")
+
+    @metrics.timed("row.create")
+    def create_component_row(self, parent):
+        """Build one empty component row; fill_component_row binds it to a component"""
+        row = self.build_component_row(parent)
+        row.update(component_name=None, version=None, image_url=None)
+
+        # Every keystroke updates the row's unsaved edits, so SAVE ALL and its count are always current
+        for entry_key, _ in self.ROW_FIELDS:
+            row[entry_key].bind("<KeyRelease>", lambda e: self.track_row_edits(row))
+        return row
+
+    def fill_component_row(self, row, index):
+        """Bind a (possibly recycled) row to the component at ``index``"""
+        component_name = self.inventory_names[index]
+        data = self.component_data(component_name)
+        edits = self.unsaved_edits.get(component_name, {})
+        row["component_name"] = component_name
+        row["version"] = self.edit_versions.get(component_name, component_version(data))
+
+        # Show the placeholder now; the actual image is swapped in once a worker has decoded it
+        image_url = data.get('image_url', '')
+        row["image_url"] = image_url
+        row["image_label"].pack_forget()
+        row["placeholder_label"].pack(expand=True)
+
+        # Check if it's a local file
+        if image_url and not image_url.startswith('http'):
+            self.image_loader.load(image_url, lambda image: self.show_component_image(row, image_url, image))
+
+        row["name_label"].configure(text=component_name)
+
+        # Unsaved text typed before the row scrolled away wins over the stored values
+        for entry_key, field in self.ROW_FIELDS:
+            entry = row[entry_key]
+            entry.delete(0, "end")
+            entry.insert(0, edits.get(field, str(data.get(field, ""))))
+        self.show_row_state(row)
+
+        row["save_button"].configure(
+            command=lambda: self.save_component_data(component_name, row["qty_entry"], row["working_entry"],
+                                                     row["not_working_entry"], row["reason_entry"]))
+
+    def show_component_image(self, row, image_url, component_image):
+        # The row may have been reused for another component, or destroyed, while the image was decoding
+        if row["image_url"] != image_url or not row["frame"].winfo_exists():
+            return
+        row["placeholder_label"].pack_forget()
+        row["image_label"].configure(image=component_image)
+        row["image_label"].pack(expand=True)
+
+    def release_component_row(self, row):
+        """Remember unsaved text in a row that is about to be reused for another component"""
+        self.track_row_edits(row)
+
+    def track_row_edits(self, row):
+        """Record which of the row's fields differ from the stored values"""
+        component_name = row["component_name"]
+        if component_name is None:
+            return
+        data = self.component_data(component_name)
+
+        edits = {}
+        for entry_key, field in self.ROW_FIELDS:
+            text = row[entry_key].get()
+            if text != str(data.get(field, "")):
+                edits[field] = text
+
+        if edits:
+            self.unsaved_edits[component_name] = edits
+            self.edit_versions.setdefault(component_name, row["version"])
+        else:
+            self.unsaved_edits.pop(component_name, None)
+            self.edit_versions.pop(component_name, None)
+        self.show_row_state(row)
+        self.update_save_all_button()
+
+    def show_row_state(self, row):
+        dirty = row["component_name"] in self.unsaved_edits
+        row["frame"].configure(border_color=self.DIRTY_ROW_BORDER_COLOR if dirty else self.ROW_BORDER_COLOR)
+
+    def show_saved_values(self, component_names):
+        """Put the stored values back into the visible rows of just-saved components"""
+        inventory = self.inventory_store.components()
+        for component_name in component_names:
+            self.edit_versions.pop(component_name, None)
+        for row in self.component_list.visible_rows():
+            if row["component_name"] in component_names:
+                data = inventory.get(row["component_name"], {})
+                row["version"] = component_version(data)
+                for entry_key, field in self.ROW_FIELDS:
+                    row[entry_key].delete(0, "end")
+                    row[entry_key].insert(0, str(data.get(field, "")))
+                self.show_row_state(row)
+        self.update_save_all_button()
+
+    def update_save_all_button(self):
+        count = len(self.unsaved_edits)
+        self.save_all_button.configure(text=f"SAVE ALL ({count})" if count else "SAVE ALL",
+                                       state="normal" if count else "disabled")
+
+    def save_component_data(self, component_name, qty_entry, working_entry, not_working_entry, reason_entry):
+        if not self.inventory_ready():
+            return
+        try:
+            fields = parse_component_fields(qty_entry.get(), working_entry.get(), not_working_entry.get(),
+                                            reason_entry.get())
+
+            # Appended to the journal instead of rewriting inventory.json; refused if another PC saved it first
+            previous = self.inventory_store.save_component(component_name, fields,
+                                                           self.edit_versions.get(component_name))
+
+            self.unsaved_edits.pop(component_name, None)
+            self.search_index.saved(self.inventory_store, [component_name])
+            self.show_saved_values([component_name])
+
+            # One toast per save, turned into a warning if the non-working count went up
+            if fields["number_not_working"] > previous["number_not_working"]:
+                self.notify(f"Data saved for {component_name}.\nWarning: Number of non-working {component_name} "
+                            f"increased from {previous['number_not_working']} to {fields['number_not_working']}!",
+                            kind="warning")
+            else:
+                self.notify(f"Data saved successfully for {component_name}!", key="saved")
+
+        except EditConflict as e:
+            self.show_conflict_dialog(e.conflicts, {component_name: fields},
+                                      lambda: self.save_component_data(component_name, qty_entry, working_entry,
+                                                                       not_working_entry, reason_entry))
+        except ValueError:
+            self.show_alert("Error", "Please enter valid numbers for quantity fields")
+        except Exception as e:
+            self.show_alert("Error", f"Failed to save data: {str(e)}")
+
+    def save_all_edits(self):
+        """Validate every edited row together and save them in one journal write, with one summary"""
+        if not self.inventory_ready():
+            return
+        for row in self.component_list.visible_rows():
+            self.track_row_edits(row)
+        if not self.unsaved_edits:
+            return
+
+        changes, errors = collect_component_changes(self.inventory_store.components(), self.unsaved_edits)
+        if errors:
+            self.show_alert("Error", "Nothing was saved. Please fix:\n" + self.summary_text(errors))
+            return
+
+        versions = {name: self.edit_versions[name] for name in changes if name in self.edit_versions}
+        try:
+            previous = self.inventory_store.save_components(changes, versions)
+        except EditConflict as e:
+            self.show_conflict_dialog(e.conflicts, changes, self.save_all_edits)
+            return
+        except Exception as e:
+            self.show_alert("Error", f"Failed to save data: {str(e)}")
+            return
+
+        self.unsaved_edits = {}
+        self.search_index.saved(self.inventory_store, changes)
+        self.show_saved_values(changes)
+
+        # Check if not working increased anywhere
+        increases = [f"{name}: {previous[name]['number_not_working']} -> {fields['number_not_working']}"
+                     for name, fields in changes.items()
+                     if fields["number_not_working"] > previous[name]["number_not_working"]]
+        message = f"Saved {len(changes)} component{'s' if len(changes) != 1 else ''}."
+        if increases:
+            message += "\nNon-working count increased:\n" + self.summary_text(increases)
+        self.notify(message, kind="warning" if increases else "info")
+
+    def show_conflict_dialog(self, conflicts, changes, retry):
+        """Ask what to do with edits to components that another PC saved after the edits began.
+
+        KEEP MINE saves the edits over the other PC's values, USE THEIRS drops
+        them (saving any other pending edits), and CANCEL leaves everything
+        unsaved. ``retry`` repeats the save that was refused.
+        """
+        lines = [f"{name}\n  saved elsewhere: {self.describe_fields(data)}\n"
+                 f"  yours: {self.describe_fields(changes[name])}" for name, data in conflicts.items()]
+
+        dialog = ctk.CTkToplevel(self.root)
+        dialog.title("Edit conflict")
+        dialog.geometry("520x360")
+        dialog.configure(fg_color="#FFFFFF")
+        dialog.attributes("-topmost", True)
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        frame = ctk.CTkFrame(dialog, fg_color="#DC143C", corner_radius=10)
+        frame.pack(fill="both", expand=True, padx=20, pady=20)
+
+        ctk.CTkLabel(frame, text="Changed on another PC", font=ctk.CTkFont(size=18, weight="bold"),
+                     text_color="white").pack(pady=(20, 10))
+        ctk.CTkLabel(frame, text=self.summary_text(lines, limit=3), font=ctk.CTkFont(size=13), text_color="white",
+                     justify="left", wraplength=440).pack(padx=20, pady=10)
+
+        def keep_mine():
+            dialog.destroy()
+            # Save again against the versions just seen
+            for name, data in conflicts.items():
+                self.edit_versions[name] = component_version(data)
+            retry()
+
+        def use_theirs():
+            dialog.destroy()
+            for name in conflicts:
+                self.unsaved_edits.pop(name, None)
+            self.show_saved_values(list(conflicts))
+            if any(name not in conflicts for name in changes) and self.unsaved_edits:
+                self.save_all_edits()
+
+        buttons = ctk.CTkFrame(frame, fg_color="transparent")
+        buttons.pack(pady=(10, 20))
+        for text, command in (("KEEP MINE", keep_mine), ("USE THEIRS", use_theirs), ("CANCEL", dialog.destroy)):
+            ctk.CTkButton(buttons, text=text, command=command, fg_color="white", text_color="#DC143C",
+                          hover_color="#f0f0f0", width=110).pack(side="left", padx=5)
+
+    @staticmethod
+    def describe_fields(data):
+        """A component's saved fields on one line, for the conflict dialog"""
+        text = (f"qty {data.get('quantity_in_hand', 0)}, working {data.get('number_working', 0)}, "
+                f"not working {data.get('number_not_working', 0)}")
+        if data.get("reason"):
+            text += f", reason \"{data['reason']}\""
+        return text
+
+    def describe_change(self, change):
+        """One component's change between two reports on one line, for the compare screen"""
+        if change["kind"] != "changed":
+            side = 1 if change["kind"] == "added" else 0
+            return f"{change['kind']}: " + self.describe_fields({field: values[side]
+                                                                 for field, values in change["fields"].items()})
+        labels = {"quantity_in_hand": "qty", "number_working": "working", "number_not_working": "not working"}
+        return ", ".join(f"{labels[field]} {before} -> {after}" if field in labels
+                         else f"reason \"{before}\" -> \"{after}\""
+                         for field, (before, after) in change["fields"].items())
+
+    @staticmethod
+    def summary_text(lines, limit=4):
+        """Join ``lines`` for an alert, cutting the list short so the dialog stays readable"""
+        text = "\n".join(lines[:limit])
+        if len(lines) > limit:
+            text += f"\n...and {len(lines) - limit} more"
+        return text
+
+    def generate_and_export_report(self):
+        if not self.inventory_ready():
+            return
+        try:
+            # Snapshots and archives the inventory, then builds the PDF on the export worker;
+            # watch_exports reports the result
+            branch_name = self.current_user_data["branch_name"] if self.current_user_data else "Unknown"
+            self.report_service.export(self.current_user, branch_name)
+            if not self.watching_exports:
+                self.watch_exports()
+
+        except Exception as e:
+            self.show_alert("Error", f"Failed to export report: {str(e)}")
+
+    def watch_exports(self):
+        """Refresh export progress and announce finished exports until the queue is idle"""
+        for job in self.export_queue.take_finished():
+            if job.status == "done":
+                self.notify(f"Inventory report exported successfully!\nPDF saved as: {job.filename}")
+            elif job.status == "failed":
+                self.show_alert("Error", f"Failed to export report: {str(job.error)}")
+
+        self.update_export_status()
+        self.watching_exports = self.export_queue.active()
+        if self.watching_exports:
+            self.root.after(200, self.watch_exports)
+        elif self.close_pending:
+            self.close()
+
+    def update_export_status(self):
+        if self.export_status_frame is None or not self.export_status_frame.winfo_exists():
+            return
+
+        job = self.export_queue.current_job()
+        if job is None:
+            self.export_status_frame.pack_forget()
+            return
+
+        queued = self.export_queue.queued_count() - (job.status == "queued")
+        text = f"Exporting {os.path.basename(job.filename)}"
+        if queued:
+            text += f" (+{queued} queued)"
+        self.export_status_label.configure(text=text)
+        self.export_progress.set(job.progress)
+        self.export_status_frame.pack(side="right", padx=10, pady=10)
+
+    def cancel_export(self):
+        job = self.export_queue.current_job()
+        if job is not None:
+            job.cancel()
+            self.update_export_status()
+
+    def toggle_metrics_overlay(self):
+        self.show_metrics = not self.show_metrics
+        if self.metrics_label is None or not self.metrics_label.winfo_exists():
+            return
+        if self.show_metrics:
+            self.metrics_label.pack(side="left", padx=10)
+            self.update_metrics_overlay()
+        else:
+            self.metrics_label.pack_forget()
+
+    def poll_inventory(self):
+        """Show saves made on other PCs in the visible rows that have no unsaved edits"""
+        if self.inventory_poll_id is not None:
+            self.root.after_cancel(self.inventory_poll_id)
+            self.inventory_poll_id = None
+        if self.screens.current != "inventory" or self.inventory_preview is not None:
+            return
+
+        if self.inventory_store.refresh():
+            # Only the clean rows whose component was saved elsewhere since they were filled
+            inventory = self.inventory_store.components()
+            self.show_saved_values([row["component_name"] for row in self.component_list.visible_rows()
+                                    if row["component_name"] not in self.unsaved_edits
+                                    and row["version"] != component_version(inventory.get(row["component_name"], {}))])
+        # Between keystrokes, so typing does not wait for the index to catch up with other PCs' saves
+        self.search_index.sync(self.inventory_store)
+        for problem in self.inventory_store.take_problems():
+            self.notify(problem, kind="warning")
+        self.inventory_poll_id = self.root.after(self.INVENTORY_POLL_MS, self.poll_inventory)
+
+    def update_metrics_overlay(self):
+        """Refresh the header timings once a second while the overlay is shown"""
+        if self.metrics_after_id is not None:
+            self.root.after_cancel(self.metrics_after_id)
+            self.metrics_after_id = None
+        if not self.show_metrics or self.metrics_label is None or not self.metrics_label.winfo_exists():
+            return
+
+        self.metrics_label.configure(text="\n".join(metrics.summary_lines()) or "No timings yet")
+        self.metrics_after_id = self.root.after(1000, self.update_metrics_overlay)
+
+    def write_metrics(self):
+        try:
+            metrics.write(self.METRICS_FILE)
+        except OSError:
+            log.exception("Error writing metrics to %s", self.METRICS_FILE)
+        self.root.after(self.METRICS_INTERVAL_MS, self.write_metrics)
+
+    def inventory_snapshot(self):
+        """The search and the stored values of the rows on screen: enough to paint them again on the next launch"""
+        first = self.component_list.first_visible()
+        inventory = self.inventory_store.components()
+        page = self.inventory_names[first:first + len(self.component_list.visible_rows())]
+        return {"search": self.search_terms[0], "filters": self.search_terms[1],
+                "page": {name: inventory[name] for name in page if name in inventory}}
+
+    def close(self):
+        """Window closed: keep a snapshot for a kept session to resume from, then end the main loop.
+
+        Exports still running or queued would be cancelled on exit, so the
+        first close waits for them to finish; closing again cancels them.
+        """
+        if self.export_queue.active() and not self.close_pending:
+            self.close_pending = True
+            self.notify("Closing once the report exports finish; close the window again to cancel them",
+                        kind="warning")
+            if not self.watching_exports:
+                self.watch_exports()
+            return
+        if (self.current_user_data is not None and self.inventory_session is self.current_user_data
+                and self.inventory_preview is None):
+            try:
+                self.sessions.save_snapshot(self.inventory_snapshot())
+            except Exception as e:
+                print(f"Error saving session snapshot: {e}")
+        self.root.destroy()
+
+    def run(self):
+        self.root.mainloop()
+
+        # Fold any journalled saves back into inventory.json before exiting
+        self.export_queue.shutdown()
+        self.auth_worker.shutdown()
+        self.storage.close()
+        self.image_loader.shutdown()
+        self.thumbnail_store.save_index()
+        try:
+            metrics.write(self.METRICS_FILE)
+        except OSError:
+            log.exception("Error writing metrics to %s", self.METRICS_FILE)
+
+    # Provided by the front ends: how alerts, the login and register forms and component rows look
+    @abc.abstractmethod
+    def show_alert(self, title, message):
+        pass
+
+    @abc.abstractmethod
+    def build_login_screen(self, main_frame):
+        pass
+
+    @abc.abstractmethod
+    def build_register_screen(self, main_frame):
+        pass
+
+    @abc.abstractmethod
+    def build_component_row(self, parent):
+        pass
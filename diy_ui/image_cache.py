@@ -0,0 +1,70 @@
+import os
+import threading
+from collections import OrderedDict
+
+
+class ThumbnailCache:
+    """LRU cache of ready-to-use CTkImages, shared by every screen rebuild.
+
+    Entries are keyed on the file's absolute path, mtime and size, so
+    replacing an image on disk is picked up without any explicit
+    invalidation. ``max_bytes`` bounds the estimated memory held by the
+    cached images; the least recently used ones are dropped beyond it.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._keys_by_path = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _cost(image):
+        # A CTkImage keeps the PIL image plus a Tk photo of the same size, both RGBA
+        width, height = image.cget("size")
+        return width * height * 4 * 2
+
+    def lookup(self, path):
+        """Return ``(key, image)`` for ``path``; image is None on a miss, key when the file is missing"""
+        key = self._key(path)
+        if key is None:
+            return None, None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return key, None
+            self._entries.move_to_end(key)
+            return key, entry[0]
+
+    def put(self, key, image):
+        cost = self._cost(image)
+        with self._lock:
+            # A changed file gets a new key; drop the image for its old contents
+            old_key = self._keys_by_path.get(key[0])
+            if old_key is not None and old_key != key:
+                self._evict(old_key)
+
+            if key in self._entries:
+                self._evict(key)
+            self._entries[key] = (image, cost)
+            self._keys_by_path[key[0]] = key
+            self.total_bytes += cost
+
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                self._evict(next(iter(self._entries)))
+
+    def _evict(self, key):
+        _, cost = self._entries.pop(key)
+        self.total_bytes -= cost
+        if self._keys_by_path.get(key[0]) == key:
+            del self._keys_by_path[key[0]]
@@ -0,0 +1,76 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ImageLoader:
+    """Decodes images on a worker pool and delivers them on the Tk thread.
+
+    ``decode(path)`` runs on a worker and returns a PIL image (or None).
+    ``wrap(pil_image)`` runs on the Tk thread and turns it into the CTkImage
+    that gets cached and passed to the callbacks. Results are collected with
+    ``root.after`` polling, so callbacks can touch widgets freely and Tk is
+    never called from a worker.
+    """
+
+    def __init__(self, root, cache, decode, wrap, workers=4, poll_ms=30):
+        self.root = root
+        self.cache = cache
+        self.decode = decode
+        self.wrap = wrap
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-loader")
+        self._results = queue.Queue()
+        self._waiting = {}
+        self._polling = False
+
+    def load(self, path, on_ready):
+        """Call ``on_ready(image)`` with the image for ``path``, immediately if it is cached"""
+        key, image = self.cache.lookup(path)
+        if key is None:
+            return
+        if image is not None:
+            on_ready(image)
+            return
+
+        # Several rows can ask for the same file; decode it once and answer them all
+        callbacks = self._waiting.get(key)
+        if callbacks is not None:
+            callbacks.append(on_ready)
+            return
+        self._waiting[key] = [on_ready]
+        self._executor.submit(self._decode, key, path)
+
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._deliver)
+
+    def _decode(self, key, path):
+        try:
+            image = self.decode(path)
+        except Exception as e:
+            print(f"Error loading component image {path}: {e}")
+            image = None
+        self._results.put((key, image))
+
+    def _deliver(self):
+        while True:
+            try:
+                key, pil_image = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            callbacks = self._waiting.pop(key, [])
+            if pil_image is None:
+                continue
+            image = self.wrap(pil_image)
+            self.cache.put(key, image)
+            for callback in callbacks:
+                callback(image)
+
+        if self._waiting:
+            self.root.after(self.poll_ms, self._deliver)
+        else:
+            self._polling = False
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
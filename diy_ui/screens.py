@@ -0,0 +1,37 @@
+import customtkinter as ctk
+
+
+class ScreenManager:
+    """Builds each screen once and switches between them by hiding and showing frames.
+
+    ``add(name, build, refresh=None)`` registers a screen: ``build(frame)``
+    creates its widgets inside ``frame`` the first time it is shown, and
+    ``refresh()`` runs on every show after that (and right after the build)
+    to update whatever data the widgets display. Navigating back to a screen
+    then costs its refresh, not rebuilding its widgets.
+    """
+
+    def __init__(self, root, **frame_options):
+        self.root = root
+        self.frame_options = frame_options
+        self.current = None
+        self._screens = {}
+        self._frames = {}
+
+    def add(self, name, build, refresh=None):
+        self._screens[name] = (build, refresh)
+
+    def show(self, name):
+        build, refresh = self._screens[name]
+        frame = self._frames.get(name)
+        if frame is None:
+            frame = self._frames[name] = ctk.CTkFrame(self.root, **self.frame_options)
+            build(frame)
+
+        if self.current is not None and self.current != name:
+            self._frames[self.current].pack_forget()
+        self.current = name
+        # Refreshed before packing, so the old contents never flash up
+        if refresh:
+            refresh()
+        frame.pack(fill="both", expand=True)
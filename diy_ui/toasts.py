@@ -0,0 +1,76 @@
+import customtkinter as ctk
+
+
+class ToastQueue:
+    """Short in-window notifications, shown one at a time in a single reused widget.
+
+    ``show(message)`` queues a message for the corner of the window. A
+    message with the same ``key`` (the message itself unless given) as one
+    waiting or on screen is folded into it as a "+N more" count instead of
+    queued again, so a burst of saves ends up as one toast. Nothing opens
+    a window or grabs input; clicking a toast dismisses it.
+    """
+
+    COLORS = {"info": "#333333", "warning": "#DC143C"}
+
+    def __init__(self, root, duration_ms=2500, gap_ms=150):
+        self.root = root
+        self.duration_ms = duration_ms
+        self.gap_ms = gap_ms
+        self._queue = []
+        self._current = None
+        self._after_id = None
+
+        self.frame = ctk.CTkFrame(root, corner_radius=10)
+        self.label = ctk.CTkLabel(self.frame, text="", text_color="white", font=ctk.CTkFont(size=14),
+                                  wraplength=360, justify="left")
+        self.label.pack(padx=16, pady=10)
+        for widget in (self.frame, self.label):
+            widget.bind("<Button-1>", lambda e: self._hide())
+
+    def show(self, message, kind="info", key=None):
+        key = message if key is None else key
+        for toast in filter(None, [self._current] + self._queue):
+            if toast["key"] == key and toast["kind"] == kind:
+                toast["message"] = message
+                toast["count"] += 1
+                if toast is self._current:
+                    self._render()
+                    self._schedule(self._duration(), self._hide)
+                return
+
+        self._queue.append({"key": key, "kind": kind, "message": message, "count": 1})
+        if self._current is None and self._after_id is None:
+            self._next()
+
+    def _duration(self):
+        # Warnings stay up twice as long, since they usually need acting on
+        return self.duration_ms * (2 if self._current["kind"] == "warning" else 1)
+
+    def _render(self):
+        toast = self._current
+        text = toast["message"]
+        if toast["count"] > 1:
+            text += f"  (+{toast['count'] - 1} more)"
+        self.frame.configure(fg_color=self.COLORS.get(toast["kind"], self.COLORS["info"]))
+        self.label.configure(text=text)
+
+    def _next(self):
+        self._after_id = None
+        if not self._queue:
+            return
+        self._current = self._queue.pop(0)
+        self._render()
+        self.frame.place(relx=1.0, rely=1.0, x=-20, y=-20, anchor="se")
+        self.frame.lift()
+        self._schedule(self._duration(), self._hide)
+
+    def _hide(self):
+        self._current = None
+        self.frame.place_forget()
+        self._schedule(self.gap_ms, self._next)
+
+    def _schedule(self, delay_ms, callback):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._after_id = self.root.after(delay_ms, callback)
@@ -0,0 +1,180 @@
+import sys
+import tkinter
+
+import customtkinter as ctk
+
+
+class VirtualList(ctk.CTkFrame):
+    """Scrollable list that only builds widgets for the rows around the viewport.
+
+    ``create_row(parent)`` builds one empty row and returns a dict of its
+    widgets, which must include the outer ``"frame"``. ``fill_row(row, index)``
+    binds such a row to item ``index``, and the optional ``release_row(row)``
+    is called just before a row is handed to another item. Rows that scroll
+    out of view are recycled for the ones scrolling in, so the number of live
+    widgets depends on the window height rather than on ``item_count``.
+
+    Every row must have the same height; the pitch is measured from the
+    first row that gets built.
+
+    With ``item_key(index)``, ``reset`` keeps the rows that already show an
+    item of the new set and only moves them, so narrowing a search fills
+    just the rows whose item actually changed.
+    """
+
+    def __init__(self, master, create_row, fill_row, release_row=None, item_count=0, item_key=None,
+                 overscan=2, row_gap=10, scroll_step=40, **kwargs):
+        super().__init__(master, **kwargs)
+        self.create_row = create_row
+        self.fill_row = fill_row
+        self.release_row = release_row
+        self.item_count = item_count
+        self.item_key = item_key
+        self.overscan = overscan
+        self.row_gap = row_gap
+        self.scroll_step = scroll_step
+
+        self._offset = 0
+        self._pitch = None
+        self._visible = {}
+        self._keys = {}
+        self._stale = {}
+        self._free = []
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.viewport = ctk.CTkFrame(self, fg_color="transparent", corner_radius=0)
+        self.viewport.pack(side="left", fill="both", expand=True)
+        self.viewport.bind("<Configure>", lambda e: self._layout())
+
+        # Same global wheel bindings CTkScrollableFrame uses; events for other widgets are ignored. Added to,
+        # not replaced, since screens are kept and several lists can exist at once
+        self.bind_all("<MouseWheel>", self._on_mousewheel, add="+")
+        self.bind_all("<Button-4>", self._on_mousewheel, add="+")
+        self.bind_all("<Button-5>", self._on_mousewheel, add="+")
+
+    def reset(self, item_count, first=0):
+        """Point the list at a new set of items, scrolled to item ``first`` (the top by default)"""
+        self.item_count = item_count
+        self._offset = first * self._pitch if self._pitch else 0
+        if self.item_key is None:
+            self.refresh()
+            return
+        # Rows are matched to the new items by key in _layout; the ones left over are released there
+        self._stale = {self._keys[index]: row for index, row in self._visible.items()}
+        self._visible = {}
+        self._keys = {}
+        self._layout()
+
+    def refresh(self):
+        """Re-bind every materialized row, e.g. after the underlying items changed"""
+        for row in self._visible.values():
+            self._release(row)
+        self._free.extend(self._visible.values())
+        self._visible = {}
+        self._keys = {}
+        self._layout()
+
+    def visible_rows(self):
+        """The rows currently bound to items, e.g. to read back what was typed into them"""
+        return list(self._visible.values())
+
+    def first_visible(self):
+        """Index of the item at the top of the viewport"""
+        return int(self._offset // self._pitch) if self._pitch else 0
+
+    def scroll_to(self, offset):
+        self._offset = max(0, min(offset, self._max_offset()))
+        self._layout()
+
+    def _release(self, row):
+        if self.release_row:
+            self.release_row(row)
+
+    def _max_offset(self):
+        if not self._pitch:
+            return 0
+        return max(0, self.item_count * self._pitch - self.viewport.winfo_height())
+
+    def _new_row(self):
+        row = self.create_row(self.viewport)
+        if self._pitch is None:
+            self.viewport.update_idletasks()
+            self._pitch = row["frame"].winfo_reqheight() + self.row_gap
+        return row
+
+    def _layout(self):
+        height = self.viewport.winfo_height()
+        if height <= 1 or not self.item_count:
+            wanted = range(0)
+        else:
+            if self._pitch is None:
+                self._free.append(self._new_row())
+            self._offset = min(self._offset, self._max_offset())
+            first = max(0, int(self._offset // self._pitch) - self.overscan)
+            last = min(self.item_count, int((self._offset + height) // self._pitch) + 1 + self.overscan)
+            wanted = range(first, last)
+
+        for index in [index for index in self._visible if index not in wanted]:
+            row = self._visible.pop(index)
+            self._keys.pop(index, None)
+            self._release(row)
+            self._free.append(row)
+
+        for index in wanted:
+            row = self._visible.get(index)
+            if row is None:
+                key = self.item_key(index) if self.item_key else None
+                row = self._stale.pop(key, None) if self._stale else None
+                if row is None:
+                    row = self._free.pop() if self._free else self._new_row()
+                    self.fill_row(row, index)
+                self._visible[index] = row
+                if self.item_key:
+                    self._keys[index] = key
+            # Plain Tk place: offsets here are real pixels, not CTk-scaled units
+            tkinter.Frame.place(row["frame"], x=0, y=index * self._pitch - self._offset, relwidth=1)
+
+        for row in self._stale.values():
+            self._release(row)
+            self._free.append(row)
+        self._stale = {}
+
+        for row in self._free:
+            row["frame"].place_forget()
+
+        self._update_scrollbar(height)
+
+    def _update_scrollbar(self, height):
+        total = self.item_count * self._pitch if self._pitch else 0
+        if total <= height:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self._offset / total, (self._offset + height) / total)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            total = self.item_count * (self._pitch or 0)
+            self.scroll_to(float(amount) * total)
+        elif unit == "pages":
+            self.scroll_to(self._offset + int(amount) * self.viewport.winfo_height())
+        else:
+            self.scroll_to(self._offset + int(amount) * self.scroll_step)
+
+    def _on_mousewheel(self, event):
+        # The wheel is bound app-wide, so only scroll for this list and the widgets inside it (not for a
+        # sibling such as .!frame20 when this is .!frame2)
+        widget, path = str(event.widget), str(self)
+        if not self.winfo_exists() or not (widget == path or widget.startswith(path + ".")):
+            return
+
+        if event.num == 4:
+            steps = -1
+        elif event.num == 5:
+            steps = 1
+        elif sys.platform == "darwin":
+            steps = -event.delta
+        else:
+            steps = -event.delta // 120 or (-1 if event.delta > 0 else 1)
+        self.scroll_to(self._offset + steps * self.scroll_step)
@@ -0,0 +1,19 @@
+import json
+import os
+import sys
+
+import pytest
+
+# The tests import diy_core and diy_ui from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def json_file(tmp_path):
+    """Write ``data`` to ``tmp_path/name`` (inventory.json by default) and return its path"""
+    def write(data, name="inventory.json"):
+        path = str(tmp_path / name)
+        with open(path, "w") as f:
+            json.dump(data, f)
+        return path
+    return write
@@ -0,0 +1,66 @@
+import pytest
+
+from diy_core.branches import branch_key
+from diy_core.storage import open_storage
+
+
+def component(quantity, working, not_working):
+    return {"image_url": "", "quantity_in_hand": quantity, "number_working": working,
+            "number_not_working": not_working, "reason": ""}
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def storage(request, tmp_path, json_file):
+    json_file({"Servo": component(5, 4, 1), "Sensor": component(2, 2, 0)})
+    storage = open_storage(request.param, str(tmp_path))
+    yield storage
+    storage.close()
+
+
+def counts(totals, name):
+    data = totals[name]
+    return data["quantity_in_hand"], data["number_working"], data["number_not_working"], data["branches"]
+
+
+def test_first_branch_takes_the_catalog_counts_and_later_ones_start_empty(storage):
+    north = storage.branches.store("North")
+    south = storage.branches.store("South")
+    assert north.components()["Servo"]["quantity_in_hand"] == 5
+    assert south.components()["Servo"]["quantity_in_hand"] == 0
+    # Names that only differ in case or punctuation are the same branch
+    assert storage.branches.store("north!") is north
+    assert list(storage.branches.names().values()) == ["North", "South"]
+
+
+def test_totals_follow_saves_incrementally(storage):
+    north = storage.branches.store("North")
+    south = storage.branches.store("South")
+    totals = storage.totals.refresh()
+    assert counts(totals, "Servo") == (5, 4, 1, 2)
+
+    south.update("Servo", {"quantity_in_hand": 3, "number_working": 3, "number_not_working": 0})
+    north.update("Sensor", {"quantity_in_hand": 1, "number_working": 0, "number_not_working": 1})
+    totals = storage.totals.refresh()
+    assert counts(totals, "Servo") == (8, 7, 1, 2)
+    assert counts(totals, "Sensor") == (1, 0, 1, 2)
+
+    storage.branches.store("East")
+    assert counts(storage.totals.refresh(), "Servo") == (8, 7, 1, 3)
+
+
+def test_components_added_to_the_catalog_reach_every_branch(storage, tmp_path):
+    storage.branches.store("North")
+    storage.inventory.update("Motor", component(1, 1, 0))
+
+    # Picked up when the branch is next opened, e.g. on another PC
+    other = open_storage(storage.backend, str(tmp_path))
+    assert other.branches.store("North").components()["Motor"]["quantity_in_hand"] == 0
+    other.close()
+
+
+def test_branch_keys_never_merge_distinct_names():
+    assert branch_key("North Branch") == branch_key("north-branch!") == "north-branch"
+    names = ["Nord", "Nörd", "東京", "大阪", "Αθήνα", "!!!", "???"]
+    keys = [branch_key(name) for name in names]
+    assert len(set(keys)) == len(names)
+    assert all(key and "/" not in key and "\\" not in key for key in keys)
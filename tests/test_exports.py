@@ -0,0 +1,117 @@
+import os
+import threading
+from types import SimpleNamespace
+
+from diy_core.exports import ExportQueue
+from diy_inv import InventoryApp
+
+
+def write_report(path, job):
+    job.report_progress(0.5)
+    with open(path, "w") as f:
+        f.write("%PDF")
+
+
+def blocked_export(release):
+    """A build that waits for ``release`` while reporting progress, so it can be cancelled midway"""
+    def build(path, job):
+        while not release.wait(0.01):
+            job.report_progress(0.1)
+        write_report(path, job)
+    return build
+
+
+def wait(queue):
+    while queue.active():
+        threading.Event().wait(0.01)
+
+
+def test_exports_run_in_order_under_unique_names(tmp_path):
+    queue = ExportQueue()
+    release = threading.Event()
+    filename = str(tmp_path / "report.pdf")
+    first = queue.submit(filename, blocked_export(release))
+    second = queue.submit(filename, write_report)
+
+    assert second.filename == str(tmp_path / "report_2.pdf")
+    assert queue.current_job() is first and queue.queued_count() >= 1
+    release.set()
+    wait(queue)
+
+    assert (first.status, second.status) == ("done", "done")
+    assert sorted(os.listdir(tmp_path)) == ["report.pdf", "report_2.pdf"]
+    assert queue.take_finished() == [first, second]
+    assert queue.take_finished() == []
+    queue.shutdown()
+
+
+def test_cancelled_exports_leave_no_files(tmp_path):
+    queue = ExportQueue()
+    release = threading.Event()
+    running = queue.submit(str(tmp_path / "running.pdf"), blocked_export(release))
+    queued = queue.submit(str(tmp_path / "queued.pdf"), write_report)
+
+    queued.cancel()
+    assert queued.status == "cancelled"
+    running.cancel()
+    wait(queue)
+
+    assert running.status == "cancelled"
+    assert os.listdir(tmp_path) == []
+    queue.shutdown()
+
+
+def test_failed_export_keeps_its_error(tmp_path):
+    def fail(path, job):
+        with open(path, "w") as f:
+            f.write("half")
+        raise OSError("disk full")
+
+    queue = ExportQueue()
+    job = queue.submit(str(tmp_path / "report.pdf"), fail)
+    wait(queue)
+
+    assert job.status == "failed" and str(job.error) == "disk full"
+    assert os.listdir(tmp_path) == []
+    queue.shutdown()
+
+
+def test_closing_the_window_waits_for_running_exports(tmp_path):
+    queue = ExportQueue()
+    release = threading.Event()
+    job = queue.submit(str(tmp_path / "report.pdf"), blocked_export(release))
+    scheduled = []
+    events = []
+    app = SimpleNamespace(export_queue=queue, close_pending=False, watching_exports=False, current_user_data=None,
+                          export_status_frame=None, notify=lambda message, kind="info", key=None: events.append(kind),
+                          show_alert=lambda title, message: events.append(title),
+                          root=SimpleNamespace(after=lambda ms, callback: scheduled.append(callback),
+                                               destroy=lambda: events.append("destroyed")))
+    for name in ("close", "watch_exports", "update_export_status"):
+        setattr(app, name, getattr(InventoryApp, name).__get__(app))
+
+    app.close()
+    assert events == ["warning"] and not job.finished
+    release.set()
+    wait(queue)
+    while scheduled:
+        scheduled.pop()()
+    assert job.status == "done"
+    assert events == ["warning", "info", "destroyed"]
+
+
+def test_closing_again_cancels_the_exports(tmp_path):
+    queue = ExportQueue()
+    job = queue.submit(str(tmp_path / "report.pdf"), blocked_export(threading.Event()))
+    events = []
+    app = SimpleNamespace(export_queue=queue, close_pending=False, watching_exports=True, current_user_data=None,
+                          notify=lambda message, kind="info", key=None: events.append(kind),
+                          root=SimpleNamespace(destroy=lambda: events.append("destroyed")))
+    app.close = InventoryApp.close.__get__(app)
+
+    app.close()
+    app.close()
+    assert events == ["warning", "destroyed"]
+    # run() shuts the queue down once the main loop has ended
+    queue.shutdown()
+    assert job.status == "cancelled"
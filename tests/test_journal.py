@@ -0,0 +1,119 @@
+import json
+
+from diy_core import journal
+from diy_core.journal import InventoryJournal
+from diy_core.jsonfile import read_json
+from diy_core.store import InventoryStore
+
+
+def test_replay_applies_journal_left_by_last_run(json_file):
+    path = json_file({"a": {"n": 0}})
+    first = InventoryJournal(path)
+    first.load()
+    first.update("a", {"n": 1})
+    first.update_many({"a": {"n": 2}, "b": {"n": 5}})
+
+    # Never closed, as when the app dies
+    second = InventoryJournal(path)
+    assert second.load() == {"a": {"n": 2}, "b": {"n": 5}}
+    assert second.dirty == {"a", "b"}
+
+
+def test_torn_last_record_is_discarded(json_file):
+    path = json_file({"a": {"n": 0}})
+    first = InventoryJournal(path)
+    first.load()
+    first.update("a", {"n": 1})
+    with open(first.journal_path, "ab") as f:
+        f.write(b'{"component": "a", "fields": {"n"')
+
+    second = InventoryJournal(path)
+    assert second.load() == {"a": {"n": 1}}
+    with open(first.journal_path, "rb") as f:
+        assert f.read().endswith(b"\n")
+    assert len(second.problems) == 1
+
+
+def test_damaged_record_in_the_middle_only_loses_itself(json_file):
+    path = json_file({"a": {"n": 0}, "b": {"n": 0}})
+    first = InventoryJournal(path)
+    first.load()
+    first.update("a", {"n": 1})
+    with open(first.journal_path, "ab") as f:
+        f.write(b'{"component": "a", "fields": {"n": \n')
+        f.write(b'{"components": {"a": {"n": 5}, "b": 7}}\n')
+    first.update("b", {"n": 2})
+
+    second = InventoryJournal(path)
+    assert second.load() == {"a": {"n": 1}, "b": {"n": 2}}
+    assert len(second.problems) == 2
+
+
+def test_compaction_folds_journal_into_file(json_file):
+    path = json_file({"a": {"n": 0}})
+    first = InventoryJournal(path)
+    first.load()
+    first.update("a", {"n": 3})
+    first.compact(wait=True)
+
+    assert read_json(path) == {"a": {"n": 3}}
+    assert first.dirty == set()
+    assert not first.is_stale()
+
+
+def test_other_copies_saves_are_picked_up(json_file):
+    path = json_file({"a": {"n": 0}})
+    first = InventoryJournal(path)
+    second = InventoryJournal(path)
+    first.load()
+    second.load()
+
+    second.update("a", {"n": 7})
+    assert first.is_stale()
+    assert first.sync()
+    assert first.inventory["a"] == {"n": 7}
+
+
+def test_compaction_keeps_records_other_copies_append_meanwhile(json_file, monkeypatch):
+    path = json_file({"a": {"n": 0}, "b": {"n": 0}})
+    first = InventoryJournal(path)
+    second = InventoryJournal(path)
+    first.load()
+    second.load()
+    first.update("a", {"n": 1})
+
+    # The other copy saves while this one writes its snapshot without the lock
+    dump = json.dump
+
+    def dump_while_other_copy_saves(*args, **kwargs):
+        monkeypatch.setattr(journal.json, "dump", dump)
+        second.update("b", {"n": 42})
+        dump(*args, **kwargs)
+    monkeypatch.setattr(journal.json, "dump", dump_while_other_copy_saves)
+    first.compact(wait=True)
+
+    assert first.inventory["b"] == {"n": 42}
+    assert not first.is_stale()
+
+    # A later compaction by this copy must not write its old value back
+    first.update("a", {"n": 2})
+    first.compact(wait=True)
+    assert InventoryJournal(path).load() == {"a": {"n": 2}, "b": {"n": 42}}
+
+
+def test_failed_compaction_is_reported_through_the_store(json_file, monkeypatch):
+    path = json_file({"a": {"n": 0}})
+    store = InventoryStore(path)
+    store.load()
+    store.update("a", {"n": 1})
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(journal, "replace_file", fail)
+    store.flush()
+
+    problems = store.take_problems()
+    assert len(problems) == 1 and "disk full" in problems[0]
+    assert store.take_problems() == []
+    # Nothing was lost: the save is still in the journal
+    assert InventoryStore(path).get("a")["n"] == 1
@@ -0,0 +1,42 @@
+import os
+
+from diy_core import jsonfile
+from diy_core.jsonfile import read_json, write_json
+
+
+def test_old_version_is_kept_and_path_never_goes_missing(tmp_path, monkeypatch):
+    path = str(tmp_path / "users.json")
+    write_json(path, {"a": 1})
+
+    # Whatever another PC reads while the new version is renamed into place must be a whole file
+    replace = os.replace
+    seen = []
+
+    def checking_replace(src, dst):
+        seen.append(read_json(path))
+        replace(src, dst)
+    monkeypatch.setattr(jsonfile.os, "replace", checking_replace)
+    write_json(path, {"a": 1, "bob": 2})
+
+    assert seen == [{"a": 1}, {"a": 1}]
+    assert read_json(path) == {"a": 1, "bob": 2}
+    assert read_json(path + ".bak") == {"a": 1}
+    assert sorted(os.listdir(tmp_path)) == ["users.json", "users.json.bak"]
+
+
+def test_damaged_file_falls_back_to_the_backup(tmp_path):
+    path = str(tmp_path / "users.json")
+    write_json(path, {"a": 1})
+    write_json(path, {"a": 2})
+    with open(path, "w") as f:
+        f.write('{"a": ')
+
+    # A reader without the lock must not write the old copy over the file
+    assert read_json(path) == {"a": 1}
+    with open(path) as f:
+        assert f.read() == '{"a": '
+
+    assert read_json(path, restore=True) == {"a": 1}
+    with open(path) as f:
+        assert f.read() != '{"a": '
+    assert read_json(path) == {"a": 1}
@@ -0,0 +1,59 @@
+import pytest
+
+from diy_core.jsonfile import read_json
+from diy_core.passwords import hash_password, is_hashed, needs_rehash, verify_password
+from diy_core.sqlite_store import SqliteDatabase, SqliteUserStore
+from diy_core.users import UsernameTaken, UserStore, stored_password
+
+ITERATIONS = 1000
+PLAINTEXT_USER = {"teacher_name": "Ada", "branch_name": "North", "password": "hunter2"}
+
+
+def test_hashes_are_salted_and_verify():
+    first, second = hash_password("secret", ITERATIONS), hash_password("secret", ITERATIONS)
+    assert first != second
+    assert is_hashed(first) and "secret" not in first
+    assert verify_password("secret", first) and verify_password("secret", second)
+    assert not verify_password("Secret", first)
+
+
+def test_plaintext_and_cheaper_hashes_need_rehashing():
+    assert verify_password("hunter2", "hunter2")
+    assert needs_rehash("hunter2", ITERATIONS)
+    assert needs_rehash(hash_password("x", ITERATIONS // 2), ITERATIONS)
+    assert not needs_rehash(hash_password("x", ITERATIONS), ITERATIONS)
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def users(request, tmp_path, json_file):
+    """A user store holding one account saved with a plaintext password, and a function reading what it stores"""
+    if request.param == "json":
+        path = json_file({"ada": PLAINTEXT_USER}, "users.json")
+        yield UserStore(path, ITERATIONS), lambda: stored_password(read_json(path)["ada"])
+        return
+
+    db = SqliteDatabase(str(tmp_path / "inventory.db"))
+    db.transaction([("INSERT INTO users VALUES (?, ?, ?, ?)", ("ada", "Ada", "North", "hunter2"))])
+    yield SqliteUserStore(db, ITERATIONS), lambda: db.execute_one("SELECT password FROM users WHERE username = ?",
+                                                                  ("ada",))[0]
+    db.close()
+
+
+def test_plaintext_password_is_replaced_by_a_hash_on_login(users):
+    store, stored = users
+    assert store.authenticate("ada", "wrong") is None
+    assert stored() == "hunter2"
+
+    assert store.authenticate("ada", "hunter2") == {"teacher_name": "Ada", "branch_name": "North"}
+    assert is_hashed(stored()) and verify_password("hunter2", stored())
+    assert store.authenticate("ada", "hunter2") is not None
+
+
+def test_registered_accounts_store_only_a_hash(users):
+    store, _ = users
+    assert store.register("bob", "Bob", "South", "pa55") == {"teacher_name": "Bob", "branch_name": "South"}
+    assert is_hashed(store.load()["bob"]["password_hash"])
+    assert store.authenticate("bob", "pa55") is not None
+    assert store.authenticate("nobody", "pa55") is None
+    with pytest.raises(UsernameTaken):
+        store.register("bob", "Bob", "South", "other")
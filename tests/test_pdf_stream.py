@@ -0,0 +1,48 @@
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Table
+
+from diy_core.pdf_stream import StreamingStory, flowables_height, rows_per_page
+
+HEADER = ["Component", "Qty", "Working", "Not working", "Reason"]
+
+
+def make_table(rows):
+    return Table([HEADER] + rows)
+
+
+def test_story_pulls_flowables_only_as_the_build_needs_them(tmp_path):
+    pulled = []
+    # How many flowables the story held each time the build made it pull another
+    held = []
+    stories = []
+
+    def flowables():
+        style = getSampleStyleSheet()["Normal"]
+        for n in range(200):
+            if stories:
+                held.append(list.__len__(stories[0]))
+            pulled.append(n)
+            yield Paragraph(f"Paragraph {n}", style)
+
+    stories.append(StreamingStory(flowables(), lookahead=3))
+    story = stories[0]
+    assert len(pulled) == 3
+
+    SimpleDocTemplate(str(tmp_path / "story.pdf"), pagesize=A4).build(story)
+    assert len(pulled) == 200
+    assert max(held) < 3
+    assert (tmp_path / "story.pdf").stat().st_size > 0
+
+
+def test_rows_per_page_is_the_most_rows_that_fit():
+    sample_row = ["Component 000001", "60", "55", "5", "worn out"]
+    width, height = 450, 700
+    rows = rows_per_page(make_table, sample_row, width, height)
+
+    assert make_table([sample_row] * rows).wrap(width, height)[1] <= height
+    assert make_table([sample_row] * (rows + 1)).wrap(width, height)[1] > height
+    # Space taken above the table leaves room for fewer rows on the first page
+    heading = [Paragraph("INVENTORY REPORT", getSampleStyleSheet()["Title"])]
+    first_page = height - flowables_height(heading, width, height)
+    assert rows_per_page(make_table, sample_row, width, first_page) < rows
@@ -0,0 +1,44 @@
+from diy_core.report_diff import compare_inventories, diff_summary, find_report, is_broken
+
+ENTRIES = [
+    {"report_id": "#00001", "branch_name": "North", "generated_date": "2026-08-30 10:00:00"},
+    {"report_id": "#00002", "branch_name": "South", "generated_date": "2026-09-01 09:00:00"},
+    {"report_id": "#00003", "branch_name": "North", "generated_date": "2026-09-02 11:00:00"},
+]
+
+
+def component(working, not_working, reason=""):
+    return {"quantity_in_hand": working + not_working, "number_working": working,
+            "number_not_working": not_working, "reason": reason}
+
+
+def test_compare_inventories_joins_on_name():
+    old = {"a": component(3, 0), "b": component(2, 0), "gone": component(1, 0)}
+    new = {"b": dict(component(1, 1, "dropped"), version=4), "a": dict(component(3, 0), version=9),
+           "new": component(1, 0)}
+
+    changes = compare_inventories(old, new)
+
+    assert list(changes) == ["b", "new", "gone"]
+    # Only the fields that differ, and save counters are not compared
+    assert changes["b"] == {"kind": "changed", "fields": {"number_working": (2, 1), "number_not_working": (0, 1),
+                                                          "reason": ("", "dropped")}}
+    assert changes["new"]["kind"] == "added"
+    assert changes["gone"]["kind"] == "removed"
+    assert is_broken(changes["b"]) and not is_broken(changes["new"])
+    assert diff_summary(changes) == {"added": 1, "removed": 1, "changed": 1, "broken": 1}
+
+
+def test_find_report_by_date_stays_in_branch():
+    assert find_report(ENTRIES, "2026-09-01", "North")["report_id"] == "#00003"
+    assert find_report(ENTRIES, "2026-09-01")["report_id"] == "#00002"
+    assert find_report(ENTRIES, "", "South")["report_id"] == "#00002"
+    assert find_report(ENTRIES, "2026-10-01", "North") is None
+
+
+def test_find_report_by_id_stays_in_branch():
+    assert find_report(ENTRIES, "#00003", "North")["report_id"] == "#00003"
+    assert find_report(ENTRIES, "3", "North")["report_id"] == "#00003"
+    assert find_report(ENTRIES, "2", "North") is None
+    assert find_report(ENTRIES, "2")["report_id"] == "#00002"
+    assert find_report(ENTRIES, "#00009") is None
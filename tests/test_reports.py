@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from diy_core.report_diff import compare_inventories, compare_reports
+from diy_core.reports import ReportArchive
+from diy_core.sqlite_store import SqliteDatabase, SqliteReportArchive
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def archive(request, tmp_path):
+    if request.param == "json":
+        yield ReportArchive(str(tmp_path / "reports"), legacy_path=None, rebase_every=5)
+    else:
+        db = SqliteDatabase(str(tmp_path / "inventory.db"))
+        yield SqliteReportArchive(db, rebase_every=5)
+        db.close()
+
+
+def component(rng):
+    working, not_working = rng.randrange(10), rng.randrange(3)
+    return {"image_url": "", "quantity_in_hand": working + not_working, "number_working": working,
+            "number_not_working": not_working, "reason": rng.choice(["", "worn", "broken"])}
+
+
+def evolve(rng, inventory, step):
+    """The next report's inventory: some edits, removals, and components added or moved anywhere in the order"""
+    items = [(name, dict(data)) for name, data in inventory.items()]
+    for _ in range(rng.randrange(1, 6)):
+        index = rng.randrange(len(items))
+        items[index][1]["number_not_working"] += 1
+    for _ in range(rng.randrange(3)):
+        items.pop(rng.randrange(len(items)))
+    for n in range(rng.randrange(3)):
+        items.insert(rng.randrange(len(items) + 1), (f"new {step}.{n}", component(rng)))
+    if rng.random() < 0.3:
+        items.insert(rng.randrange(len(items) + 1), items.pop(rng.randrange(len(items))))
+    return dict(items)
+
+
+def add_reports(archive, seed, count=12):
+    rng = random.Random(seed)
+    inventory = {f"c{i:03d}": component(rng) for i in range(60)}
+    reports = {}
+    for step in range(count):
+        inventory = evolve(rng, inventory, step)
+        report_id = archive.add({"generated_by": "t", "generated_date": f"2026-09-{step + 1:02d} 10:00:00",
+                                 "branch_name": "North", "inventory_data": inventory})
+        reports[report_id] = inventory
+    return reports
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_reports_come_back_as_added(archive, seed):
+    reports = add_reports(archive, seed)
+
+    assert [entry["report_id"] for entry in archive.list_reports()] == list(reports)
+    for report_id, inventory in reports.items():
+        report = archive.get(report_id)
+        assert report["generated_by"] == "t"
+        # Same components in the same order, as the PDF lists them in this order
+        assert list(report["inventory_data"].items()) == list(inventory.items())
+
+
+def test_some_reports_are_stored_as_deltas(archive):
+    reports = add_reports(archive, 0)
+    bases = [report_id for report_id in reports if archive.delta(report_id)[0] == report_id]
+    assert 1 <= len(bases) < len(reports)
+
+
+def test_compare_reports_matches_a_full_comparison(archive):
+    reports = add_reports(archive, 1)
+    for old_id in reports:
+        for new_id in reports:
+            expected = compare_inventories(reports[old_id], reports[new_id])
+            assert dict(compare_reports(archive, old_id, new_id)) == expected
@@ -0,0 +1,64 @@
+import pytest
+
+from diy_core.search import InventoryIndex
+from diy_core.store import InventoryStore
+
+CATALOG = {
+    "Arduino Uno": {"quantity_in_hand": 4, "number_working": 3, "number_not_working": 1, "reason": "USB port loose"},
+    "Servo Motor": {"quantity_in_hand": 0, "number_working": 0, "number_not_working": 0, "reason": ""},
+    "Ultrasonic Sensor": {"quantity_in_hand": 6, "number_working": 6, "number_not_working": 0, "reason": ""},
+    "USB Cable": {"quantity_in_hand": 10, "number_working": 8, "number_not_working": 2, "reason": "frayed"},
+}
+
+
+@pytest.fixture
+def indexed(json_file):
+    """A store over CATALOG and an index synced to it"""
+    store = InventoryStore(json_file(CATALOG))
+    index = InventoryIndex()
+    index.sync(store)
+    return store, index
+
+
+def test_every_word_must_prefix_a_name_or_reason_token(indexed):
+    _, index = indexed
+    assert index.search("") == list(CATALOG)
+    assert index.search("us") == ["Arduino Uno", "USB Cable"]
+    assert index.search("u") == ["Arduino Uno", "Ultrasonic Sensor", "USB Cable"]
+    assert index.search("usb cab") == ["USB Cable"]
+    assert index.search("loose") == ["Arduino Uno"]
+    assert index.search("motor z") == []
+
+
+def test_filters_combine_with_the_query(indexed):
+    _, index = indexed
+    assert index.search(filters=["not_working"]) == ["Arduino Uno", "USB Cable"]
+    assert index.search("usb", ["not_working"]) == ["Arduino Uno", "USB Cable"]
+    assert index.search("cable", ["out_of_stock"]) == []
+    assert index.search(filters=["out_of_stock"]) == ["Servo Motor"]
+
+
+def test_saved_components_are_reindexed(indexed):
+    store, index = indexed
+    # Warm the prefix cache so the save has to invalidate it
+    assert index.search("fr") == ["USB Cable"]
+
+    store.update("USB Cable", {"reason": "", "number_not_working": 0})
+    store.update("Servo Motor", {"reason": "fried gear", "quantity_in_hand": 2})
+    index.saved(store, ["USB Cable", "Servo Motor"])
+    assert index.search("fr") == ["Servo Motor"]
+    assert index.search(filters=["not_working"]) == ["Arduino Uno"]
+    assert index.search(filters=["out_of_stock"]) == []
+
+
+def test_sync_catches_up_with_saves_from_other_copies(indexed):
+    store, index = indexed
+    assert index.search("gear") == []
+
+    other = InventoryStore(store.path)
+    other.update("Servo Motor", {"reason": "stripped gear"})
+    other.update("Breadboard", {"quantity_in_hand": 0, "reason": ""})
+    index.sync(store)
+    assert index.search("gear") == ["Servo Motor"]
+    assert index.search("bread", ["out_of_stock"]) == ["Breadboard"]
+    assert len(index) == len(CATALOG) + 1
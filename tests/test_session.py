@@ -0,0 +1,89 @@
+import base64
+import json
+import os
+
+import pytest
+
+from diy_core import session as session_module
+from diy_core.jsonfile import read_json, write_json
+from diy_core.session import KEY_SIZE, SessionStore
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    """Opens this PC's session store for the data folder in tmp_path, as each launch of the app does"""
+    def open_store(**kwargs):
+        return SessionStore(str(tmp_path / "sessions"), data_dir=str(tmp_path / "data"), **kwargs)
+    return open_store
+
+
+def test_session_resumes_with_its_snapshot(sessions):
+    store = sessions()
+    assert store.resume() is None
+    store.save_snapshot({"search": "lost"})
+    assert store.resume() is None
+
+    store.start("ada")
+    store.save_snapshot({"search": "usb"})
+    # A relaunch reads the key back from disk
+    assert sessions().resume() == ("ada", {"search": "usb"})
+
+    store.end()
+    assert store.resume() is None
+
+
+def test_edited_token_is_refused_and_forgotten(sessions):
+    store = sessions()
+    store.start("ada")
+    session = read_json(store.path)
+    body, signature = session["token"].rsplit(".", 1)
+    payload = json.loads(base64.urlsafe_b64decode(body))
+    payload["username"] = "admin"
+    forged = base64.urlsafe_b64encode(json.dumps(payload, sort_keys=True).encode("utf-8")).decode("ascii")
+    write_json(store.path, dict(session, token=forged + "." + signature), backup=False)
+
+    assert store.resume() is None
+    assert read_json(store.path, default=None) is None
+
+
+def test_token_signed_with_another_key_is_refused(sessions, tmp_path):
+    other = SessionStore(str(tmp_path / "other"), data_dir=str(tmp_path / "data"))
+    other.start("ada")
+    store = sessions()
+    store.start("ada")
+    write_json(store.path, read_json(other.path), backup=False)
+    assert store.resume() is None
+
+
+def test_session_is_tied_to_its_data_folder(sessions, tmp_path):
+    sessions().start("ada")
+    elsewhere = SessionStore(str(tmp_path / "sessions"), data_dir=str(tmp_path / "other_data"))
+    assert elsewhere.resume() is None
+
+
+def test_expired_session_is_refused(sessions, monkeypatch):
+    store = sessions(lifetime=60)
+    store.start("ada")
+    now = session_module.time.time()
+    monkeypatch.setattr(session_module.time, "time", lambda: now + 61)
+    assert store.resume() is None
+
+
+def test_damaged_session_file_is_no_session(sessions):
+    store = sessions()
+    store.start("ada")
+    with open(store.path, "w") as f:
+        f.write("{not json")
+    assert store.resume() is None
+
+
+def test_empty_key_file_is_replaced(sessions):
+    store = sessions()
+    os.makedirs(store.directory)
+    # What a crash right after creating the key file used to leave
+    open(store.key_path, "wb").close()
+    store.start("ada")
+
+    with open(store.key_path, "rb") as f:
+        assert len(f.read()) == KEY_SIZE
+    assert sessions().resume() == ("ada", {})
@@ -0,0 +1,45 @@
+import threading
+
+from diy_core.sqlite_store import SqliteDatabase, SqliteReportArchive
+
+
+def component(n):
+    return {"quantity_in_hand": n, "number_working": n, "number_not_working": 0, "reason": ""}
+
+
+def test_execute_returns_fetched_rows(tmp_path):
+    db = SqliteDatabase(str(tmp_path / "inventory.db"))
+    assert db.execute("SELECT 1 UNION ALL SELECT 2") == [(1,), (2,)]
+    assert db.execute_one("SELECT 1 WHERE 0") is None
+    db.close()
+
+
+def test_reads_on_workers_while_the_main_thread_writes(tmp_path):
+    db = SqliteDatabase(str(tmp_path / "inventory.db"))
+    archive = SqliteReportArchive(db)
+    inventory = {f"c{i}": component(i) for i in range(200)}
+    first = archive.add({"generated_by": "t", "generated_date": "2026-09-01 10:00:00", "inventory_data": inventory})
+    quantities = {name: data["quantity_in_hand"] for name, data in inventory.items()}
+    errors = []
+
+    def read():
+        try:
+            for _ in range(50):
+                report = archive.get(first)["inventory_data"]
+                assert {name: data["quantity_in_hand"] for name, data in report.items()} == quantities
+                archive.list_reports()
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+    for n in range(20):
+        archive.add({"generated_by": "t", "generated_date": "2026-09-02 10:00:00",
+                     "inventory_data": dict(inventory, extra=component(n))})
+    for reader in readers:
+        reader.join()
+
+    assert errors == []
+    assert len(archive.list_reports()) == 21
+    db.close()
@@ -0,0 +1,68 @@
+import pytest
+
+from diy_core.store import EditConflict, InventoryStore, collect_component_changes, component_version
+
+
+def two_stores(path):
+    """Two copies of the app's store on the same files, as on two lab PCs"""
+    return InventoryStore(path), InventoryStore(path)
+
+
+def test_saves_move_the_version_on(json_file):
+    store = InventoryStore(json_file({"a": {"quantity_in_hand": 1}}))
+    assert component_version(store.get("a")) == 0
+
+    previous = store.save_component("a", {"quantity_in_hand": 2}, version=0)
+    assert previous == {"quantity_in_hand": 1}
+    assert store.get("a") == {"quantity_in_hand": 2, "version": 1}
+
+
+def test_save_from_a_stale_version_raises_edit_conflict(json_file):
+    first, second = two_stores(json_file({"a": {"quantity_in_hand": 1}}))
+    version = component_version(first.get("a"))
+    second.save_component("a", {"quantity_in_hand": 5}, version=version)
+
+    with pytest.raises(EditConflict) as raised:
+        first.save_component("a", {"quantity_in_hand": 3}, version=version)
+    assert raised.value.conflicts == {"a": {"quantity_in_hand": 5, "version": 1}}
+    assert first.get("a")["quantity_in_hand"] == 5
+
+
+def test_conflicting_batch_saves_nothing(json_file):
+    first, second = two_stores(json_file({"a": {"quantity_in_hand": 1}, "b": {"quantity_in_hand": 1}}))
+    first.load()
+    second.update("b", {"quantity_in_hand": 9})
+
+    with pytest.raises(EditConflict) as raised:
+        first.save_components({"a": {"quantity_in_hand": 2}, "b": {"quantity_in_hand": 2}}, {"a": 0, "b": 0})
+    assert set(raised.value.conflicts) == {"b"}
+    assert InventoryStore(first.path).get("a") == {"quantity_in_hand": 1}
+
+
+def test_saves_without_versions_are_not_checked(json_file):
+    first, second = two_stores(json_file({"a": {"quantity_in_hand": 1}}))
+    first.load()
+    second.update("a", {"quantity_in_hand": 4})
+    first.update("a", {"quantity_in_hand": 6})
+    assert second.get("a") == {"quantity_in_hand": 6, "version": 2}
+
+
+def test_collect_component_changes_fills_in_unedited_fields():
+    inventory = {"a": {"quantity_in_hand": 3, "number_working": 2, "number_not_working": 1, "reason": "worn"},
+                 "b": {"quantity_in_hand": 1, "number_working": 1, "number_not_working": 0, "reason": ""}}
+    changes, errors = collect_component_changes(inventory, {"a": {"number_working": "1", "number_not_working": "2"},
+                                                            "b": {"reason": "  lost  "}})
+
+    assert errors == []
+    assert changes == {"a": {"quantity_in_hand": 3, "number_working": 1, "number_not_working": 2, "reason": "worn"},
+                       "b": {"quantity_in_hand": 1, "number_working": 1, "number_not_working": 0, "reason": "lost"}}
+
+
+def test_collect_component_changes_reports_every_bad_row():
+    inventory = {"a": {"quantity_in_hand": 3}, "b": {"quantity_in_hand": 1}}
+    changes, errors = collect_component_changes(inventory, {"a": {"quantity_in_hand": "three"},
+                                                            "b": {"quantity_in_hand": "2"},
+                                                            "gone": {"quantity_in_hand": "1"}})
+
+    assert list(changes) == ["b"]
+    assert errors == ["a: quantities must be whole numbers", "gone: no longer in the inventory"]